@@ -0,0 +1,281 @@
+from .gamehandler import *
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+# every move a game can make has a fixed action index, so the legal moves of
+# a batch are one (games, NUM_ACTIONS) mask and a step is one action per game:
+#   0                   draw
+#   1                   discard to ace pile
+#   2 + column          discard to column
+#   9 + column          column to ace pile
+#   16 + ((source * 7) + dest) * 13 + num_cards - 1
+#                       column to column, for every possible run length
+COLUMNS = GameHandler.COLUMNS
+MAX_RUN = len(Card.VALUES)
+DECK_SIZE = len(CARDS)
+# stands in for the card on top of an empty pile
+EMPTY = EMPTY_PILE
+
+DRAW_ACTION = 0
+DISCARD_TO_ACE_PILE_ACTION = 1
+DISCARD_TO_COLUMN_ACTIONS = 2
+COLUMN_TO_ACE_PILE_ACTIONS = DISCARD_TO_COLUMN_ACTIONS + COLUMNS
+COLUMN_TO_COLUMN_ACTIONS = COLUMN_TO_ACE_PILE_ACTIONS + COLUMNS
+NUM_ACTIONS = COLUMN_TO_COLUMN_ACTIONS + COLUMNS * COLUMNS * MAX_RUN
+# skips a game in apply, e.g. one that is already won
+NO_ACTION = -1
+
+
+def _action_moves():
+	moves = [Move(DRAW), Move(DISCARD_TO_ACE_PILE)]
+	moves += [Move(DISCARD_TO_COLUMN, dest=dest) for dest in range(COLUMNS)]
+	moves += [Move(COLUMN_TO_ACE_PILE, source) for source in range(COLUMNS)]
+	moves += [Move(COLUMN_TO_COLUMN, source, dest, num_cards)
+			  for source in range(COLUMNS) for dest in range(COLUMNS)
+			  for num_cards in range(1, MAX_RUN + 1)]
+	return moves
+
+
+# the Move of each action index, and the other way round. moves from a column
+# to itself have an index but are never legal
+ACTION_MOVES = _action_moves()
+MOVE_ACTIONS = {move: action for action, move in enumerate(ACTION_MOVES)}
+
+
+class BatchGameHandler:
+	# plays many games in lockstep, stored as numpy arrays with one row per
+	# game rather than one object per game:
+	#   stock        (games, 52) card ordinals in draw order, as in GameHandler
+	#   stock_size   (games,) cards in the stock
+	#   cursor       (games,) stock cursor, cards before it are the discard
+	#   columns      (games, 7, 52) card ordinals, bottom card first
+	#   heights      (games, 7) cards in each column
+	#   face_down    (games, 7) face-down cards at the bottom of each column
+	#   ace_piles    (games, 4) cards on each ace pile, in SUIT_ORDER, which is
+	#                also the value of its top card
+	# the rules match GameHandler, so the same seeds give the same games
+	COLUMNS = COLUMNS
+
+	def __init__(self, seeds, draw_count=1):
+		if numpy is None:
+			raise ImportError("BatchGameHandler requires numpy")
+		if draw_count not in DRAW_COUNTS:
+			raise ValueError("draw count must be 1 to 31, not %r" % (draw_count,))
+		self.seeds = list(seeds)
+		self.draw_count = draw_count
+		count = len(self.seeds)
+		deals = numpy.frombuffer(b"".join(deal_permutation(seed) for seed in self.seeds),
+								 dtype=numpy.uint8).reshape(count, DECK_SIZE)
+		self.columns = numpy.full((count, COLUMNS, DECK_SIZE), EMPTY, dtype=numpy.uint8)
+		# columns are dealt by popping cards off the end of the deck, i + 1
+		# of them to column i
+		taken = 0
+		for i in range(COLUMNS):
+			self.columns[:, i, :i + 1] = deals[:, DECK_SIZE - taken - 1 - numpy.arange(i + 1)]
+			taken += i + 1
+		self.heights = numpy.tile(numpy.arange(1, COLUMNS + 1, dtype=numpy.int16), (count, 1))
+		self.face_down = self.heights - 1
+		stock_size = DECK_SIZE - taken
+		self.stock = numpy.full((count, DECK_SIZE), EMPTY, dtype=numpy.uint8)
+		self.stock[:, :stock_size] = deals[:, stock_size - 1::-1]
+		self.stock_size = numpy.full(count, stock_size, dtype=numpy.int16)
+		self.cursor = numpy.zeros(count, dtype=numpy.int16)
+		self.ace_piles = numpy.zeros((count, len(SUIT_ORDER)), dtype=numpy.int16)
+
+	@classmethod
+	def from_games(cls, game_handlers):
+		# a batch holding the current positions of game_handlers, which must
+		# share a draw count. histories aren't kept
+		if numpy is None:
+			raise ImportError("BatchGameHandler requires numpy")
+		batch = cls.__new__(cls)
+		batch.seeds = [game_handler.seed for game_handler in game_handlers]
+		batch.draw_count = game_handlers[0].draw_count
+		count = len(game_handlers)
+		batch.columns = numpy.full((count, COLUMNS, DECK_SIZE), EMPTY, dtype=numpy.uint8)
+		batch.heights = numpy.zeros((count, COLUMNS), dtype=numpy.int16)
+		batch.face_down = numpy.zeros((count, COLUMNS), dtype=numpy.int16)
+		batch.stock = numpy.full((count, DECK_SIZE), EMPTY, dtype=numpy.uint8)
+		batch.stock_size = numpy.zeros(count, dtype=numpy.int16)
+		batch.cursor = numpy.zeros(count, dtype=numpy.int16)
+		batch.ace_piles = numpy.zeros((count, len(SUIT_ORDER)), dtype=numpy.int16)
+		for g, game_handler in enumerate(game_handlers):
+			for i, column in enumerate(game_handler.columns):
+				batch.columns[g, i, :len(column)] = [card.ordinal for card in column]
+				batch.heights[g, i] = len(column)
+				batch.face_down[g, i] = sum(not card.face_up for card in column)
+			stock = game_handler.stock
+			batch.stock[g, :len(stock)] = [card.ordinal for card in stock]
+			batch.stock_size[g] = len(stock)
+			batch.cursor[g] = game_handler.cursor
+			for s, suit in enumerate(SUIT_ORDER):
+				batch.ace_piles[g, s] = len(game_handler.ace_piles[suit])
+		return batch
+
+	def __len__(self):
+		return len(self.seeds)
+
+	def game(self, index):
+		# the game at index as a GameHandler, with an empty history
+		stock = [CARDS[ordinal] for ordinal in self.stock[index, :self.stock_size[index]]]
+		ace_piles = [[CARDS[s * MAX_RUN + value].flip()
+					  for value in range(self.ace_piles[index, s])]
+					 for s in range(len(SUIT_ORDER))]
+		columns = []
+		for i in range(COLUMNS):
+			face_down = self.face_down[index, i]
+			columns.append([
+				CARDS[ordinal] if depth < face_down else CARDS[ordinal].flip()
+				for depth, ordinal in enumerate(self.columns[index, i, :self.heights[index, i]])])
+		return GameHandler.from_piles([stock] + ace_piles + columns, int(self.cursor[index]),
+									  self.draw_count, self.seeds[index])
+
+	def is_won(self):
+		return (self.ace_piles == MAX_RUN).all(axis=1)
+
+	# --- move generation ---
+
+	def legal_moves(self):
+		# (games, NUM_ACTIONS) bool mask of the legal actions of every game
+		count = len(self)
+		mask = numpy.zeros((count, NUM_ACTIONS), dtype=bool)
+		mask[:, DRAW_ACTION] = self.stock_size > 0
+
+		tops = self.column_tops()
+		discard = self.discard_tops()
+		mask[:, DISCARD_TO_ACE_PILE_ACTION] = self.can_add_to_ace_pile(discard)
+		mask[:, DISCARD_TO_COLUMN_ACTIONS:COLUMN_TO_ACE_PILE_ACTIONS] = \
+			self.can_add_to_column(discard[:, None], tops)
+		mask[:, COLUMN_TO_ACE_PILE_ACTIONS:COLUMN_TO_COLUMN_ACTIONS] = \
+			self.can_add_to_ace_pile(tops)
+
+		# the card num_cards from the top of every column, or EMPTY where
+		# that card is missing or face down. (games, source, num_cards)
+		depths = self.heights[:, :, None] - numpy.arange(1, MAX_RUN + 1)
+		face_up = depths >= self.face_down[:, :, None]
+		cards = numpy.take_along_axis(self.columns, numpy.maximum(depths, 0), axis=2)
+		cards = numpy.where(face_up, cards, EMPTY)
+		# (games, source, dest, num_cards)
+		fits = self.can_add_to_column(cards[:, :, None, :], tops[:, None, :, None])
+		fits[:, numpy.arange(COLUMNS), numpy.arange(COLUMNS), :] = False
+		mask[:, COLUMN_TO_COLUMN_ACTIONS:] = fits.reshape(count, -1)
+		return mask
+
+	def column_tops(self):
+		# (games, 7) top card ordinal of every column, EMPTY if it has none
+		tops = numpy.take_along_axis(self.columns,
+									 numpy.maximum(self.heights - 1, 0)[:, :, None],
+									 axis=2)[:, :, 0]
+		return numpy.where(self.heights > 0, tops, EMPTY)
+
+	def discard_tops(self):
+		# (games,) top discard ordinal, EMPTY if there is none
+		tops = self.stock[numpy.arange(len(self)), numpy.maximum(self.cursor - 1, 0)]
+		return numpy.where(self.cursor > 0, tops, EMPTY)
+
+	# --- validators, vectorized over any shape of card arrays ---
+
+	def can_add_to_ace_pile(self, cards):
+		# cards is (games, ...), each checked against the ace pile of its
+		# suit. EMPTY never fits
+		suits = CARD_SUITS_ARRAY[cards]
+		heights = numpy.take_along_axis(
+			self.ace_piles, suits.reshape(len(self), -1), axis=1).reshape(cards.shape)
+		tops = numpy.where(heights > 0, suits * MAX_RUN + heights - 1, EMPTY)
+		return ACE_PILE_STACKS[cards, tops]
+
+	def can_add_to_column(self, cards, tops):
+		# EMPTY cards never fit
+		return COLUMN_STACKS[cards, tops]
+
+	# --- moves ---
+
+	def apply(self, actions):
+		# plays one action per game. NO_ACTION leaves a game as it is. an
+		# illegal action raises IllegalMoveError before any game is changed
+		actions = numpy.asarray(actions)
+		playing = actions != NO_ACTION
+		games = numpy.nonzero(playing)[0]
+		if not self.legal_moves()[games, actions[games]].all():
+			raise IllegalMoveError
+
+		draw = games[actions[games] == DRAW_ACTION]
+		if len(draw):
+			cursor = self.cursor[draw]
+			size = self.stock_size[draw]
+			self.cursor[draw] = numpy.minimum(numpy.where(cursor == size, 0, cursor) +
+											  self.draw_count, size)
+
+		to_ace_pile = games[actions[games] == DISCARD_TO_ACE_PILE_ACTION]
+		if len(to_ace_pile):
+			cards = self._pop_discard(to_ace_pile)
+			self.ace_piles[to_ace_pile, CARD_SUITS_ARRAY[cards]] += 1
+
+		to_column = games[(actions[games] >= DISCARD_TO_COLUMN_ACTIONS) &
+						  (actions[games] < COLUMN_TO_ACE_PILE_ACTIONS)]
+		if len(to_column):
+			dest = actions[to_column] - DISCARD_TO_COLUMN_ACTIONS
+			cards = self._pop_discard(to_column)
+			self.columns[to_column, dest, self.heights[to_column, dest]] = cards
+			self.heights[to_column, dest] += 1
+
+		to_ace_pile = games[(actions[games] >= COLUMN_TO_ACE_PILE_ACTIONS) &
+							(actions[games] < COLUMN_TO_COLUMN_ACTIONS)]
+		if len(to_ace_pile):
+			source = actions[to_ace_pile] - COLUMN_TO_ACE_PILE_ACTIONS
+			self.heights[to_ace_pile, source] -= 1
+			cards = self.columns[to_ace_pile, source, self.heights[to_ace_pile, source]]
+			self.columns[to_ace_pile, source, self.heights[to_ace_pile, source]] = EMPTY
+			self.ace_piles[to_ace_pile, CARD_SUITS_ARRAY[cards]] += 1
+			self._flip_tops(to_ace_pile, source)
+
+		to_column = games[actions[games] >= COLUMN_TO_COLUMN_ACTIONS]
+		if len(to_column):
+			pair, run = numpy.divmod(actions[to_column] - COLUMN_TO_COLUMN_ACTIONS, MAX_RUN)
+			source, dest = numpy.divmod(pair, COLUMNS)
+			num_cards = run + 1
+			start = self.heights[to_column, source] - num_cards
+			end = self.heights[to_column, dest]
+			for i in range(MAX_RUN):
+				moving = i < num_cards
+				if not moving.any():
+					break
+				g, s, d = to_column[moving], source[moving], dest[moving]
+				self.columns[g, d, end[moving] + i] = self.columns[g, s, start[moving] + i]
+				self.columns[g, s, start[moving] + i] = EMPTY
+			self.heights[to_column, source] -= num_cards
+			self.heights[to_column, dest] += num_cards
+			self._flip_tops(to_column, source)
+
+	def _pop_discard(self, games):
+		# removes the top discard card of each game, shifting the deck cards
+		# after it down. returns the removed cards
+		index = self.cursor[games] - 1
+		cards = self.stock[games, index]
+		positions = numpy.arange(DECK_SIZE)
+		shifted = numpy.minimum(positions + (positions >= index[:, None]), DECK_SIZE - 1)
+		stock = numpy.take_along_axis(self.stock[games], shifted, axis=1)
+		stock[numpy.arange(len(games)), self.stock_size[games] - 1] = EMPTY
+		self.stock[games] = stock
+		self.stock_size[games] -= 1
+		self.cursor[games] = index
+		return cards
+
+	def _flip_tops(self, games, columns):
+		# turns over the top card of columns left with only face-down cards
+		face_down = self.face_down[games, columns]
+		flip = (face_down > 0) & (face_down == self.heights[games, columns])
+		self.face_down[games[flip], columns[flip]] -= 1
+
+
+if numpy is not None:
+	# the stackability tables as arrays, with a row for an EMPTY card that
+	# fits nowhere, and suits by card ordinal
+	COLUMN_STACKS = numpy.array(CAN_STACK_ON_COLUMN + ((False,) * (EMPTY + 1),))
+	ACE_PILE_STACKS = numpy.array(CAN_STACK_ON_ACE_PILE + ((False,) * (EMPTY + 1),))
+	CARD_SUITS_ARRAY = numpy.array([SUIT_ORDER.index(card.suit) for card in CARDS] + [0],
+								   dtype=numpy.intp)
\ No newline at end of file
@@ -0,0 +1,255 @@
+import json
+import platform
+import sys
+from collections import namedtuple
+from random import Random
+from timeit import default_timer
+from .fakecurses import *
+from .rendercache import *
+from .simulation import *
+from .uihandler import *
+
+
+Benchmark = namedtuple("Benchmark", ["name", "setup", "number"])
+
+# a result is the best time per operation over all repeats, in seconds.
+# the best time is the one least disturbed by the rest of the machine
+BenchmarkResult = namedtuple("BenchmarkResult", ["name", "seconds", "number", "repeat"])
+
+BENCHMARK_SEED = 1
+FORMAT_VERSION = 1
+
+
+# --- setups ---
+# a setup builds fresh state and returns the function to time. the state is
+# rebuilt for every repeat, so benchmarks may mutate it
+
+def _new_game():
+	game_handler = GameHandler(BENCHMARK_SEED)
+	return lambda: game_handler.new_game(BENCHMARK_SEED)
+
+
+def _draw_cycle():
+	# every draw through the stock, plus the recycle back to the start
+	game_handler = GameHandler(BENCHMARK_SEED)
+	draws = range(len(game_handler.stock) + 1)
+
+	def run():
+		for _ in draws:
+			game_handler.draw()
+	return run
+
+
+def _draw_cycle_three():
+	game_handler = GameHandler(BENCHMARK_SEED, draw_count=3)
+	draws = range(len(game_handler.stock) // 3 + 2)
+
+	def run():
+		for _ in draws:
+			game_handler.draw()
+	return run
+
+
+def _move_setup(build, move):
+	# applies and undoes one move, regenerating the legal moves after each so
+	# the incremental move index is part of the cost
+	def setup():
+		game_handler = GameHandler(BENCHMARK_SEED)
+		build(game_handler)
+		game_handler.refresh()
+		game_handler.legal_moves()
+		if move not in game_handler.legal_moves():
+			raise ValueError("benchmark move %s is not legal" % (move,))
+
+		def run():
+			game_handler.apply(move)
+			game_handler.legal_moves()
+			game_handler.undo()
+			game_handler.legal_moves()
+		return run
+	return setup
+
+
+def _build_discard_to_ace_pile(game_handler):
+	game_handler.discard = [Card(1, "spades").flip()]
+
+
+def _build_discard_to_column(game_handler):
+	game_handler.discard = [Card(12, "hearts").flip()]
+	game_handler.columns[0] = [Card(13, "spades").flip()]
+
+
+def _build_column_to_ace_pile(game_handler):
+	# the move also turns over the card underneath
+	game_handler.columns[1] = [Card(5, "clubs"), Card(1, "hearts").flip()]
+
+
+def _build_column_to_column(game_handler):
+	# a three card run onto a king, turning over the card underneath
+	game_handler.columns[0] = [Card(13, "clubs").flip()]
+	game_handler.columns[3] = [Card(2, "clubs"), Card(2, "spades"),
+							   Card(12, "diamonds").flip(),
+							   Card(11, "spades").flip(),
+							   Card(10, "hearts").flip()]
+
+
+def _playouts(policy):
+	# whole games from a fixed run of deals
+	def setup():
+		seeds = iter(range(BENCHMARK_SEED, sys.maxsize))
+		return lambda: play_game(next(seeds), policy, max_moves=500)
+	return setup
+
+
+def _ui_handler():
+	terminal = FakeTerminal()
+	game_handler = GameHandler(BENCHMARK_SEED)
+	return GameUiHandler(terminal.screen, game_handler, RenderCache(), terminal)
+
+
+def _draw_screen():
+	ui_handler = _ui_handler()
+	return ui_handler.draw_screen
+
+
+def _populate_column():
+	# the longest starting column, served from the render cache
+	ui_handler = _ui_handler()
+	return lambda: ui_handler.populate_column(GameHandler.COLUMNS - 1)
+
+
+def _populate_column_uncached():
+	ui_handler = _ui_handler()
+
+	def run():
+		ui_handler.render_cache = RenderCache()
+		ui_handler.populate_column(GameHandler.COLUMNS - 1)
+	return run
+
+
+BENCHMARKS = [
+	Benchmark("new_game", _new_game, 200),
+	Benchmark("draw.cycle", _draw_cycle, 100),
+	Benchmark("draw.cycle_three", _draw_cycle_three, 100),
+	Benchmark("move.discard_to_ace_pile",
+			  _move_setup(_build_discard_to_ace_pile, Move(DISCARD_TO_ACE_PILE)), 1000),
+	Benchmark("move.discard_to_column",
+			  _move_setup(_build_discard_to_column, Move(DISCARD_TO_COLUMN, dest=0)), 1000),
+	Benchmark("move.column_to_ace_pile",
+			  _move_setup(_build_column_to_ace_pile, Move(COLUMN_TO_ACE_PILE, source=1)), 1000),
+	Benchmark("move.column_to_column",
+			  _move_setup(_build_column_to_column, Move(COLUMN_TO_COLUMN, 3, 0, 3)), 1000),
+	Benchmark("playout.random", _playouts(random_policy), 10),
+	Benchmark("playout.greedy", _playouts(greedy_policy), 10),
+	Benchmark("ui.draw_screen", _draw_screen, 100),
+	Benchmark("ui.populate_column", _populate_column, 1000),
+	Benchmark("ui.populate_column_uncached", _populate_column_uncached, 1000)
+]
+
+
+# --- repaint costs ---
+# what each ui action costs on the terminal, from the fake terminal's
+# counters. unlike the timings these are exact, so they can be compared
+# between machines
+
+REPAINT_ACTIONS = [
+	("draw", lambda ui_handler: ui_handler.draw()),
+	("select_column", lambda ui_handler: ui_handler.select_column(GameHandler.COLUMNS - 1)),
+	("cancel_selection", lambda ui_handler: ui_handler.clear_selection()),
+	("scroll", lambda ui_handler: ui_handler.scroll(3)),
+	("draw_screen", lambda ui_handler: ui_handler.draw_screen())
+]
+
+
+def measure_repaints(height=40, width=100):
+	# the actions run in order on one game, each followed by a render
+	terminal = FakeTerminal(height, width)
+	ui_handler = GameUiHandler(terminal.screen, GameHandler(BENCHMARK_SEED),
+							   RenderCache(), terminal)
+	costs = {"startup": terminal.counters()}
+	for name, action in REPAINT_ACTIONS:
+		terminal.reset_counters()
+		action(ui_handler)
+		ui_handler.render()
+		costs[name] = terminal.counters()
+	return costs
+
+
+# --- running ---
+
+def run_benchmark(benchmark, repeat=5, scale=1.0):
+	best = None
+	number = max(1, int(benchmark.number * scale))
+	for _ in range(repeat):
+		run = benchmark.setup()
+		start = default_timer()
+		for _ in range(number):
+			run()
+		elapsed = default_timer() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return BenchmarkResult(benchmark.name, best / number, number, repeat)
+
+
+def run_benchmarks(names=None, repeat=5, scale=1.0, on_result=None):
+	# names filters by prefix, so "move" runs every move benchmark
+	results = []
+	for benchmark in BENCHMARKS:
+		if names and not any(benchmark.name.startswith(name) for name in names):
+			continue
+		result = run_benchmark(benchmark, repeat, scale)
+		results.append(result)
+		if on_result:
+			on_result(result)
+	return results
+
+
+# --- saving and comparing ---
+
+def results_as_dict(results):
+	return {
+		"version": FORMAT_VERSION,
+		"python": platform.python_version(),
+		"implementation": platform.python_implementation(),
+		"machine": platform.machine(),
+		"results": {result.name: {"seconds": result.seconds,
+								  "number": result.number,
+								  "repeat": result.repeat}
+					for result in results}
+	}
+
+
+def save_results(results, path):
+	with open(path, "w") as f:
+		json.dump(results_as_dict(results), f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+	with open(path) as f:
+		data = json.load(f)
+	return {name: result["seconds"] for name, result in data["results"].items()}
+
+
+Comparison = namedtuple("Comparison", ["name", "baseline", "current", "ratio", "regressed"])
+
+
+def compare_results(baseline, results, threshold=0.1):
+	# ratio is current / baseline time, so anything over 1 + threshold is a
+	# regression. benchmarks missing from the baseline are skipped
+	comparisons = []
+	for result in results:
+		if result.name not in baseline:
+			continue
+		baseline_seconds = baseline[result.name]
+		ratio = result.seconds / baseline_seconds if baseline_seconds else 1.0
+		comparisons.append(Comparison(result.name, baseline_seconds,
+									  result.seconds, ratio,
+									  ratio > 1 + threshold))
+	return comparisons
+
+
+def format_seconds(seconds):
+	for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+		if seconds * scale >= 1:
+			return "%.2f%s" % (seconds * scale, unit)
+	return "%.0fns" % (seconds * 1e9)
\ No newline at end of file
@@ -1,6 +1,3 @@
-from random import shuffle
-
-
 class Card:
 	WIDTH = 9
 	HEIGHT = 6
@@ -40,27 +37,83 @@ class Card:
 		13: "K"
 	}
 
-	def __init__(self, value, suit):
-		# initializes a face-down playing card
-		self.value = value
-		self.suit = suit
-		self.suit_symbol = self.SUITS.get(suit).get("symbol")
-		self.display_value = self.DISPLAY_VALUES.get(value, str(value))
-		self.is_red = self.SUITS.get(suit).get("is_red")
-		self.face_up = False
+	__slots__ = ("value", "suit", "suit_symbol", "display_value", "is_red",
+				 "face_up", "ordinal", "code", "_twin")
+
+	def __new__(cls, value, suit):
+		# cards are interned, so this returns the canonical face-down card
+		if value not in cls.VALUES:
+			raise ValueError("card value must be 1 to 13, not %r" % (value,))
+		return CARDS[SUIT_ORDER.index(suit) * len(cls.VALUES) + value - 1]
+
+	@classmethod
+	def _intern(cls, value, suit, face_up):
+		card = object.__new__(cls)
+		ordinal = SUIT_ORDER.index(suit) * len(cls.VALUES) + value - 1
+		fields = {
+			"value": value,
+			"suit": suit,
+			"suit_symbol": cls.SUITS.get(suit).get("symbol"),
+			"display_value": cls.DISPLAY_VALUES.get(value, str(value)),
+			"is_red": cls.SUITS.get(suit).get("is_red"),
+			"face_up": face_up,
+			"ordinal": ordinal,
+			"code": ordinal | FACE_UP if face_up else ordinal
+		}
+		for name, field in fields.items():
+			object.__setattr__(card, name, field)
+		return card
 
 	def flip(self):
-		self.face_up = not self.face_up
-		return self
+		# face-up state belongs to the pile holding the card, so flipping
+		# returns the interned twin instead of mutating this card
+		return self._twin
+
+	def __setattr__(self, name, value):
+		raise AttributeError("cards are immutable")
 
 	def __eq__(self, other):
-		return self.value == other.value and self.suit == other.suit
+		if not isinstance(other, Card):
+			return NotImplemented
+		return self.ordinal == other.ordinal
+
+	def __hash__(self):
+		return self.ordinal
+
+	def __reduce__(self):
+		return card_from_code, (self.code,)
 
+	def __repr__(self):
+		state = "up" if self.face_up else "down"
+		return "Card({}, {!r}, {})".format(self.value, self.suit, state)
 
-def get_deck():
-	deck = []
-	for suit in Card.SUITS:
+
+# cards are encoded as their ordinal (suit index * 13 + value - 1) with the
+# face-up state stored in a spare high bit
+FACE_UP = 0x40
+
+SUIT_ORDER = list(Card.SUITS)
+
+
+def _intern_cards():
+	cards = []
+	cards_by_code = [None] * (FACE_UP * 2)
+	for suit in SUIT_ORDER:
 		for value in Card.VALUES:
-			deck.append(Card(value, suit))
-	shuffle(deck)
-	return deck
\ No newline at end of file
+			face_down = Card._intern(value, suit, False)
+			face_up = Card._intern(value, suit, True)
+			object.__setattr__(face_down, "_twin", face_up)
+			object.__setattr__(face_up, "_twin", face_down)
+			cards_by_code[face_down.code] = face_down
+			cards_by_code[face_up.code] = face_up
+			cards.append(face_down)
+	return tuple(cards), tuple(cards_by_code)
+
+
+# canonical face-down cards indexed by ordinal, and every interned card
+# indexed by its encoded value
+CARDS, CARDS_BY_CODE = _intern_cards()
+
+
+def card_from_code(code):
+	return CARDS_BY_CODE[code]
\ No newline at end of file
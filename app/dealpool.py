@@ -0,0 +1,113 @@
+import json
+import os
+from queue import Queue, Empty, Full
+from threading import Event, Lock, Thread
+from .solver import *
+
+
+POOL_VERSION = 1
+
+
+def default_pool_path():
+	return os.environ.get("SOLITAIRE_DEAL_POOL",
+						  os.path.join(os.path.expanduser("~"), ".solitaire", "deals.json"))
+
+
+class DealPool:
+	# deal ids the solver has shown to be winnable, found by a background
+	# thread. the queue is bounded, so the thread idles once the pool is
+	# full. the pool is saved to path whenever it changes, with one list per
+	# draw count, so deals found in one run are there for the next
+	def __init__(self, path=None, draw_count=1, size=20, max_nodes=5000):
+		self.path = path
+		self.draw_count = draw_count
+		self.max_nodes = max_nodes
+		self.deals_checked = 0
+		self._queue = Queue(maxsize=size)
+		self._stop = Event()
+		self._save_lock = Lock()
+		self._thread = None
+		for deal_id in self._load()[:size]:
+			self._queue.put_nowait(deal_id)
+
+	def __len__(self):
+		return self._queue.qsize()
+
+	def start(self):
+		if self._thread is None:
+			self._thread = Thread(target=self._fill, name="deal pool", daemon=True)
+			self._thread.start()
+		return self
+
+	def stop(self, wait=True):
+		# without wait the thread is left to finish its current solve, or to
+		# die with the process as it is a daemon
+		self._stop.set()
+		if self._thread is not None and wait:
+			self._thread.join()
+			self._thread = None
+			self._stop.clear()
+
+	def take(self, timeout=None):
+		# a winnable deal id. waits for the thread when the pool is empty,
+		# returning None if timeout runs out first
+		try:
+			deal_id = self._queue.get(timeout=timeout)
+		except Empty:
+			return None
+		self.save()
+		return deal_id
+
+	def deals(self):
+		with self._queue.mutex:
+			return list(self._queue.queue)
+
+	def save(self):
+		if self.path is None:
+			return
+		with self._save_lock:
+			try:
+				with open(self.path) as f:
+					data = json.load(f)
+				if data.get("version") != POOL_VERSION:
+					data = {}
+			except (OSError, ValueError):
+				data = {}
+			pools = data.get("deals", {})
+			pools[str(self.draw_count)] = self.deals()
+			directory = os.path.dirname(self.path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			temp_path = self.path + ".tmp"
+			with open(temp_path, "w") as f:
+				json.dump({"version": POOL_VERSION, "deals": pools}, f)
+			os.replace(temp_path, self.path)
+
+	def _load(self):
+		if self.path is None:
+			return []
+		try:
+			with open(self.path) as f:
+				data = json.load(f)
+		except (OSError, ValueError):
+			return []
+		if data.get("version") != POOL_VERSION:
+			return []
+		return data.get("deals", {}).get(str(self.draw_count), [])
+
+	def _fill(self):
+		solver = Solver(max_nodes=self.max_nodes)
+		while not self._stop.is_set():
+			deal_id = random_deal_id()
+			winnable = solver.is_winnable(GameHandler(deal_id, self.draw_count))
+			self.deals_checked += 1
+			if not winnable:
+				# unwinnable, or too hard to prove within max_nodes
+				continue
+			while not self._stop.is_set():
+				try:
+					self._queue.put(deal_id, timeout=0.1)
+				except Full:
+					continue
+				self.save()
+				break
\ No newline at end of file
@@ -0,0 +1,73 @@
+from random import getrandbits
+from .card import *
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+# a deal id is turned into a permutation of the 52 card ordinals by giving
+# every card a splitmix64 key and sorting on it. each key only depends on
+# (deal id, ordinal), so whole batches of deals can be computed at once
+MASK_64 = (1 << 64) - 1
+DECK_SIZE = len(CARDS)
+DEAL_ID_BITS = 32
+
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+
+
+def random_deal_id():
+	return getrandbits(DEAL_ID_BITS)
+
+
+def deal_permutation(deal_id):
+	# card ordinals in deck order, the last card being the top of the deck
+	keys = [_splitmix64(deal_id * DECK_SIZE + ordinal)
+			for ordinal in range(DECK_SIZE)]
+	return bytes(sorted(range(DECK_SIZE), key=keys.__getitem__))
+
+
+def deal_deck(deal_id):
+	return [CARDS[ordinal] for ordinal in deal_permutation(deal_id)]
+
+
+def deal_stream(start, count, batch_size=4096):
+	# yields the permutations of deals start..start + count - 1 as bytes
+	end = start + count
+	for batch_start in range(start, end, batch_size):
+		batch_count = min(batch_size, end - batch_start)
+		if numpy is None:
+			for deal_id in range(batch_start, batch_start + batch_count):
+				yield deal_permutation(deal_id)
+		else:
+			for row in deal_batch(batch_start, batch_count):
+				yield row.tobytes()
+
+
+def deal_batch(start, count):
+	# (count, 52) uint8 array of permutations, one row per deal
+	if numpy is None:
+		raise ImportError("deal_batch requires numpy")
+	deal_ids = numpy.arange(start, start + count, dtype=numpy.uint64)
+	ordinals = numpy.arange(DECK_SIZE, dtype=numpy.uint64)
+	counters = deal_ids[:, None] * numpy.uint64(DECK_SIZE) + ordinals
+	keys = _splitmix64_array(counters)
+	return numpy.argsort(keys, axis=1, kind="stable").astype(numpy.uint8)
+
+
+def _splitmix64(value):
+	value = (value + _GOLDEN_GAMMA) & MASK_64
+	value = ((value ^ (value >> 30)) * _MIX_1) & MASK_64
+	value = ((value ^ (value >> 27)) * _MIX_2) & MASK_64
+	return value ^ (value >> 31)
+
+
+def _splitmix64_array(values):
+	# uint64 arithmetic wraps, matching the masking in _splitmix64
+	values = values + numpy.uint64(_GOLDEN_GAMMA)
+	values = (values ^ (values >> numpy.uint64(30))) * numpy.uint64(_MIX_1)
+	values = (values ^ (values >> numpy.uint64(27))) * numpy.uint64(_MIX_2)
+	return values ^ (values >> numpy.uint64(31))
\ No newline at end of file
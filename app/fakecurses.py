@@ -0,0 +1,241 @@
+# in-memory stand-in for the parts of curses used by GameUiHandler, so the
+# ui can run without a tty. like curses, windows are copied to a virtual
+# screen by noutrefresh and doupdate sends only the cells that differ from
+# what is on the terminal. the terminal counts what that would have cost
+
+BLANK = (" ", 0)
+
+
+class error(Exception):
+	pass
+
+
+class FakeWindow:
+	def __init__(self, terminal, buffer, height, width, begin_y=0, begin_x=0,
+				 is_pad=False):
+		# buffer is the rows of (char, attr) cells shared with the parent
+		# window, begin_y/begin_x is this window's offset in it. windows
+		# share the screen's buffer, so their offset is also their position
+		self.terminal = terminal
+		self._buffer = buffer
+		self._height = height
+		self._width = width
+		self._begin_y = begin_y
+		self._begin_x = begin_x
+		self._is_pad = is_pad
+		self._attr = 0
+
+	def getmaxyx(self):
+		return self._height, self._width
+
+	def subwin(self, height, width, begin_y, begin_x):
+		return FakeWindow(self.terminal, self._buffer, height, width,
+						  begin_y, begin_x)
+
+	def subpad(self, height, width, begin_y, begin_x):
+		return FakeWindow(self.terminal, self._buffer, height, width,
+						  self._begin_y + begin_y, self._begin_x + begin_x,
+						  is_pad=True)
+
+	def erase(self):
+		for y in range(self._height):
+			row = self._buffer[self._begin_y + y]
+			row[self._begin_x:self._begin_x + self._width] = [BLANK] * self._width
+		self.terminal.cells_written += self._height * self._width
+
+	def clear(self):
+		# like curses, the next update repaints the whole terminal
+		self.erase()
+		self.terminal.clear_pending = True
+
+	def addstr(self, y, x, text, attr=0):
+		if not (0 <= y < self._height and 0 <= x and x + len(text) <= self._width):
+			raise error("addstr outside of window")
+		row = self._buffer[self._begin_y + y]
+		start_x = self._begin_x + x
+		attr |= self._attr
+		for i, char in enumerate(text):
+			row[start_x + i] = (char, attr)
+		self.terminal.cells_written += len(text)
+
+	def attron(self, attr):
+		self._attr |= attr
+
+	def attroff(self, attr):
+		self._attr &= ~attr
+
+	def border(self, ls="│", rs="│", ts="─", bs="─",
+			   tl="┌", tr="┐", bl="└", br="┘"):
+		# 0 picks the default character, as in curses
+		ls, rs, ts, bs, tl, tr, bl, br = [
+			char if char else default for char, default in zip(
+				(ls, rs, ts, bs, tl, tr, bl, br),
+				("│", "│", "─", "─",
+				 "┌", "┐", "└", "┘"))]
+		last_y = self._height - 1
+		last_x = self._width - 1
+		for x in range(1, last_x):
+			self._put(0, x, ts)
+			self._put(last_y, x, bs)
+		for y in range(1, last_y):
+			self._put(y, 0, ls)
+			self._put(y, last_x, rs)
+		self._put(0, 0, tl)
+		self._put(0, last_x, tr)
+		self._put(last_y, 0, bl)
+		self._put(last_y, last_x, br)
+
+	def box(self):
+		self.border()
+
+	def noutrefresh(self, *args):
+		# windows take no arguments. pads take the pad corner to show and
+		# the screen rectangle to show it in
+		self.terminal.refresh_calls += 1
+		if self._is_pad:
+			pad_y, pad_x, start_y, start_x, end_y, end_x = args
+			self.terminal.stage(self._buffer,
+								self._begin_y + pad_y, self._begin_x + pad_x,
+								start_y, start_x,
+								end_y - start_y + 1, end_x - start_x + 1)
+		else:
+			self.terminal.stage(self._buffer, self._begin_y, self._begin_x,
+								self._begin_y, self._begin_x,
+								self._height, self._width)
+
+	def refresh(self, *args):
+		self.noutrefresh(*args)
+		self.terminal.doupdate()
+
+	def getch(self):
+		return self.terminal.getch()
+
+	def keypad(self, flag):
+		pass
+
+	def nodelay(self, flag):
+		self.terminal.no_delay = flag
+
+	def text(self):
+		# the window contents as lines of text, for tests
+		return ["".join(cell[0] for cell in
+						self._buffer[self._begin_y + y][self._begin_x:self._begin_x + self._width])
+				for y in range(self._height)]
+
+	def _put(self, y, x, char):
+		self._buffer[self._begin_y + y][self._begin_x + x] = (char, self._attr)
+		self.terminal.cells_written += 1
+
+
+class FakeTerminal:
+	# provides the module level curses functions, owns the screen, and counts
+	# the work done:
+	#   cells_written   cells set by drawing calls, including erases
+	#   refresh_calls   refresh and noutrefresh calls
+	#   updates         doupdate calls, including the one inside refresh
+	#   cells_emitted   cells that differed from the terminal on update
+	#   bytes_emitted   estimated output size of those cells, with cursor
+	#                   moves and attribute changes
+	def __init__(self, height=50, width=100, keys=()):
+		# keys are read in order. None is a pause: non-blocking reads see no
+		# key until a blocking read passes it
+		self.height = height
+		self.width = width
+		self.screen = FakeWindow(self, _new_buffer(height, width), height, width)
+		self.keys = list(keys)
+		self.no_delay = False
+		self.clear_pending = False
+		# the attribute the terminal is currently drawing with
+		self._attr = 0
+		self._virtual = _new_buffer(height, width)
+		self._physical = _new_buffer(height, width)
+		self.reset_counters()
+
+	def reset_counters(self):
+		self.cells_written = 0
+		self.refresh_calls = 0
+		self.updates = 0
+		self.cells_emitted = 0
+		self.bytes_emitted = 0
+
+	def counters(self):
+		return {
+			"cells_written": self.cells_written,
+			"refresh_calls": self.refresh_calls,
+			"updates": self.updates,
+			"cells_emitted": self.cells_emitted,
+			"bytes_emitted": self.bytes_emitted
+		}
+
+	def color_pair(self, number):
+		return number << 8
+
+	def newpad(self, height, width):
+		return FakeWindow(self, _new_buffer(height, width), height, width,
+						  is_pad=True)
+
+	def getch(self):
+		# -1 once the queued keys run out
+		if self.keys and self.keys[0] is None:
+			if self.no_delay:
+				return -1
+			self.keys.pop(0)
+		return self.keys.pop(0) if self.keys else -1
+
+	def stage(self, buffer, buffer_y, buffer_x, start_y, start_x, height, width):
+		# copies a rectangle of a window buffer to the virtual screen,
+		# clipped to the terminal
+		height = min(height, self.height - start_y, len(buffer) - buffer_y)
+		width = min(width, self.width - start_x, len(buffer[0]) - buffer_x)
+		for y in range(max(height, 0)):
+			self._virtual[start_y + y][start_x:start_x + width] = \
+				buffer[buffer_y + y][buffer_x:buffer_x + width]
+
+	def doupdate(self):
+		# emits the cells that changed, one cursor move per run of changed
+		# cells and one attribute change whenever the attribute differs
+		self.updates += 1
+		emitted = 0
+		num_bytes = 0
+		if self.clear_pending:
+			self._physical = _new_buffer(self.height, self.width)
+			num_bytes += len(CLEAR_SCREEN)
+			self.clear_pending = False
+		attr = self._attr
+		for y, (virtual_row, physical_row) in enumerate(zip(self._virtual, self._physical)):
+			if virtual_row == physical_row:
+				continue
+			cursor_x = None
+			for x, cell in enumerate(virtual_row):
+				if cell == physical_row[x]:
+					continue
+				if cursor_x != x:
+					num_bytes += len(MOVE_CURSOR % (y + 1, x + 1))
+				if cell[1] != attr:
+					attr = cell[1]
+					num_bytes += len(SET_COLOR % (attr >> 8))
+				num_bytes += len(cell[0].encode("utf-8"))
+				physical_row[x] = cell
+				cursor_x = x + 1
+				emitted += 1
+		self._attr = attr
+		self.cells_emitted += emitted
+		self.bytes_emitted += num_bytes
+
+	def text(self):
+		# what the terminal shows, as lines of text
+		return ["".join(cell[0] for cell in row) for row in self._physical]
+
+	def cells(self):
+		# what the terminal shows, as rows of (char, attr)
+		return [row[:] for row in self._physical]
+
+
+# escape sequences used to estimate output size
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+MOVE_CURSOR = "\x1b[%d;%dH"
+SET_COLOR = "\x1b[0;%dm"
+
+
+def _new_buffer(height, width):
+	return [[BLANK] * width for _ in range(height)]
\ No newline at end of file
@@ -0,0 +1,77 @@
+from .rendercache import *
+
+
+# the same layout as GameUiHandler, built as plain lines of text so any
+# terminal, socket or test can show it without curses
+PADDING = 1
+SPACING = 2
+COLUMNS = 7
+WIDTH = Card.WIDTH * COLUMNS + SPACING * (COLUMNS - 1) + PADDING * 2
+
+CARD_BOX = ((0, 0, TOP_BORDER, PLAIN),) + tuple(
+	row for y in range(1, Card.HEIGHT - 1)
+	for row in ((y, 0, Card.V_LINE, PLAIN), (y, Card.WIDTH - 1, Card.V_LINE, PLAIN))
+) + ((Card.HEIGHT - 1, 0, BOTTOM_BORDER, PLAIN),)
+DECK_ROWS = CARD_BOX + tuple((y, 1, "/" * (Card.WIDTH - 2), PLAIN)
+							 for y in range(1, Card.HEIGHT - 1))
+EMPTY_PILE_ROWS = EMPTY_COLUMN_ROWS
+
+ACE_PILES_X = [PADDING + i * (Card.WIDTH + SPACING) for i in range(len(SUIT_ORDER))]
+DECK_X = WIDTH - PADDING - Card.WIDTH * 2 - SPACING
+DISCARD_X = DECK_X + Card.WIDTH + SPACING
+COLUMNS_X = [PADDING + i * (Card.WIDTH + SPACING) for i in range(COLUMNS)]
+LABELS_Y = PADDING + Card.HEIGHT + SPACING - 1
+COLUMNS_Y = LABELS_Y + 1
+LABELS = "".join(str(i).center(Card.WIDTH + SPACING) for i in range(COLUMNS))
+
+
+class FrameBuilder:
+	# renders a game to lines of text. every pile comes from the shared
+	# render cache, so many builders, e.g. one per server session, reuse
+	# the same precomputed rows
+	def __init__(self, render_cache=RENDER_CACHE):
+		self.render_cache = render_cache
+
+	def build(self, game_handler, selected=None, num_selected=0):
+		# selected is a column index to highlight num_selected cards of. the
+		# highlight only changes border styles, so it shows in text as the
+		# column being marked in the labels
+		cache = self.render_cache
+		columns = game_handler.columns
+		column_rows = [cache.column_rows(column, num_selected if i == selected else 0)
+					   for i, column in enumerate(columns)]
+		height = COLUMNS_Y + PADDING + max(
+			(rows[-1][0] + 1 for rows in column_rows if rows), default=Card.HEIGHT)
+		grid = [[" "] * WIDTH for _ in range(height)]
+
+		for suit, x in zip(Card.SUITS, ACE_PILES_X):
+			ace_pile = game_handler.ace_piles[suit]
+			self._card(grid, PADDING, x, ace_pile[-1] if ace_pile else None)
+		if game_handler.cursor == len(game_handler.stock):
+			_blit(grid, PADDING, DECK_X, EMPTY_PILE_ROWS)
+		else:
+			_blit(grid, PADDING, DECK_X, DECK_ROWS)
+		self._card(grid, PADDING, DISCARD_X, game_handler.discard_top())
+
+		labels = LABELS
+		if selected is not None:
+			label_x = selected * (Card.WIDTH + SPACING) + (Card.WIDTH + SPACING) // 2
+			labels = labels[:label_x - 1] + "[%d]" % selected + labels[label_x + 2:]
+		_blit(grid, LABELS_Y, PADDING, ((0, 0, labels, PLAIN),))
+		for x, rows in zip(COLUMNS_X, column_rows):
+			_blit(grid, COLUMNS_Y, x, rows)
+		return ["".join(row).rstrip() for row in grid]
+
+	def _card(self, grid, y, x, card):
+		if card is None:
+			_blit(grid, y, x, EMPTY_PILE_ROWS)
+		else:
+			_blit(grid, y, x, CARD_BOX)
+			_blit(grid, y, x, self.render_cache.face_rows(card))
+
+
+def _blit(grid, start_y, start_x, rows):
+	for y, x, text, _ in rows:
+		row = grid[start_y + y]
+		x += start_x
+		row[x:x + len(text)] = text
\ No newline at end of file
@@ -1,91 +1,622 @@
-from .card import *
+from collections import namedtuple
+from itertools import product
+from random import Random
+from .deals import *
+
+
+# lightweight record of a move. kind is the name of the GameHandler method
+# that performs it, source/dest are column indices where relevant
+Move = namedtuple("Move", ["kind", "source", "dest", "num_cards"],
+				  defaults=[None, None, 1])
+
+DRAW = "draw"
+DISCARD_TO_ACE_PILE = "discard_to_ace_pile"
+DISCARD_TO_COLUMN = "discard_to_column"
+COLUMN_TO_ACE_PILE = "column_to_ace_pile"
+COLUMN_TO_COLUMN = "column_to_column"
+
+MOVE_KINDS = [DRAW, DISCARD_TO_ACE_PILE, DISCARD_TO_COLUMN,
+			  COLUMN_TO_ACE_PILE, COLUMN_TO_COLUMN]
+
+# cards turned over per draw. the replay log keeps it in 5 bits
+DRAW_COUNTS = range(1, 32)
+
+# points scored by a move, plus FLIP_SCORE when it turns over a card
+MOVE_SCORES = {
+	DISCARD_TO_ACE_PILE: 10,
+	COLUMN_TO_ACE_PILE: 10,
+	DISCARD_TO_COLUMN: 5
+}
+FLIP_SCORE = 5
+
+# journal of applied moves, with what is needed to reverse them. flipped is
+# set when the move turned over a column card, recycled when a draw turned
+# the discard back into the deck, cursor is the stock cursor before a draw
+# and suit is the ace pile a card went to
+JournalEntry = namedtuple("JournalEntry",
+						  ["move", "flipped", "recycled", "cursor", "suit"])
+
+# zobrist keys, one random 64-bit number per (location, depth, card code).
+# locations are the stock, the four ace piles then the columns. the stock
+# cursor gets a key of its own
+STOCK_LOCATION = 0
+ACE_PILE_LOCATIONS = {suit: 1 + i for i, suit in enumerate(SUIT_ORDER)}
+COLUMN_LOCATION = 1 + len(SUIT_ORDER)
+MAX_PILE_SIZE = len(CARDS)
+
+
+def zobrist_key(location, depth, card):
+	return ZOBRIST_KEYS[((location * MAX_PILE_SIZE) + depth) * FACE_UP * 2 + card.code]
+
+
+def zobrist_pile(location, pile, start=0):
+	# xor of the keys of pile[start:] at their depths
+	value = 0
+	for depth in range(start, len(pile)):
+		value ^= zobrist_key(location, depth, pile[depth])
+	return value
+
+
+def zobrist_relocate(pile, location, new_location):
+	# the change in hash from moving pile, at the same depths, to another
+	# location
+	stride = FACE_UP * 2
+	start = location * MAX_PILE_SIZE * stride
+	new_start = new_location * MAX_PILE_SIZE * stride
+	value = 0
+	for depth, card in enumerate(pile):
+		offset = depth * stride + card.code
+		value ^= ZOBRIST_KEYS[start + offset] ^ ZOBRIST_KEYS[new_start + offset]
+	return value
+
+
+# stackability lookups by card ordinal. CAN_STACK_ON_COLUMN[card][top] is
+# whether card can go on a column topped by top, and CAN_STACK_ON_ACE_PILE
+# the same for an ace pile. top is EMPTY_PILE when the pile is empty
+EMPTY_PILE = len(CARDS)
+
+
+def _stack_table(fits_empty, fits):
+	return tuple(tuple([fits(card, top) for top in CARDS] + [fits_empty(card)])
+				 for card in CARDS)
+
+
+# king can be added to empty column, otherwise one lower in the other color
+CAN_STACK_ON_COLUMN = _stack_table(
+	lambda card: card.value == 13,
+	lambda card, top: card.value == top.value - 1 and card.is_red != top.is_red)
+# ace can be added to empty pile, otherwise one higher in the same suit
+CAN_STACK_ON_ACE_PILE = _stack_table(
+	lambda card: card.value == 1,
+	lambda card, top: card.value == top.value + 1 and card.suit == top.suit)
 
 
 class GameHandler:
 	COLUMNS = 7
 
-	def __init__(self):
-		self.new_game()
+	# piles tracked by the move index. moves are indexed by (source, dest)
+	# pair, so a change to a pile only re-examines the pairs it takes part in
+	DISCARD = "discard"
+	ACE_PILES = "ace_piles"
+	MOVE_SOURCES = [DISCARD] + list(range(COLUMNS))
+	MOVE_DESTS = [ACE_PILES] + list(range(COLUMNS))
+	MOVE_PAIRS = [pair for pair in product(MOVE_SOURCES, MOVE_DESTS)
+				  if pair[0] != pair[1]]
+
+	def __init__(self, seed=None, draw_count=1, debug=False, recorder=None):
+		# in debug mode every move checks the incremental hash against a
+		# full recomputation. recorder, if given, is told about every new
+		# game, move and undo, e.g. a replay.ReplayWriter
+		self.debug = debug
+		self.recorder = recorder
+		self.new_game(seed, draw_count)
 
-	def new_game(self):
-		self.deck = get_deck()
-		self.discard = []
+	def new_game(self, seed=None, draw_count=None):
+		# the same seed always gives the same deal. draw_count defaults to
+		# the current game's
+		if draw_count is not None:
+			if draw_count not in DRAW_COUNTS:
+				raise ValueError("draw count must be 1 to 31, not %r" % (draw_count,))
+			self.draw_count = draw_count
+		self.seed = random_deal_id() if seed is None else seed
+		deck = deal_deck(self.seed)
 		self.ace_piles = {suit: [] for suit in Card.SUITS}
 		self.columns = []
 		for i in range(self.COLUMNS):
 			column = []
 			count = 0
 			while count < i:
-				column.append(self.deck.pop())
+				column.append(deck.pop())
 				count += 1
-			column.append(self.deck.pop().flip())
+			column.append(deck.pop().flip())
 			self.columns.append(column)
+		# the deck and discard share one face-down array in draw order.
+		# cards before the cursor have been drawn, so drawing and recycling
+		# only move the cursor
+		self.stock = deck[::-1]
+		self.cursor = 0
+		self._history = []
+		self._redo = []
+		self.refresh()
+		if self.recorder is not None:
+			self.recorder.start_game(self.seed, self.draw_count)
+
+	def refresh(self):
+		# rebuilds cached state. call after editing the piles directly
+		self._move_index = {pair: () for pair in self.MOVE_PAIRS}
+		self._legal_moves = None
+		self._dirty_piles = set(PAIRS_BY_PILE)
+		self._hash = self.compute_hash()
+		self.face_down_count = self.count_face_down()
+
+	@classmethod
+	def from_piles(cls, piles, cursor, draw_count=1, seed=None):
+		# a game in the position given by piles, the stock then the ace piles
+		# in SUIT_ORDER then the columns, with an empty history
+		game_handler = cls.__new__(cls)
+		game_handler.debug = False
+		game_handler.recorder = None
+		game_handler.seed = seed
+		game_handler.draw_count = draw_count
+		game_handler.stock = list(piles[0])
+		game_handler.cursor = cursor
+		game_handler.ace_piles = {suit: list(piles[1 + SUIT_ORDER.index(suit)])
+								  for suit in Card.SUITS}
+		game_handler.columns = [list(column) for column in piles[1 + len(SUIT_ORDER):]]
+		game_handler._history = []
+		game_handler._redo = []
+		game_handler.refresh()
+		return game_handler
+
+	def pack(self):
+		# the position as bytes: draw count and stock cursor, then every pile
+		# as in pack_piles. about a byte per card, so many positions can be
+		# kept, compared and hashed without holding card lists. the seed and
+		# history aren't included
+		return bytes((self.draw_count, self.cursor)) + pack_piles(self)
+
+	@classmethod
+	def from_packed(cls, data, seed=None):
+		piles, _ = unpack_piles(data, 2)
+		return cls.from_piles(piles, data[1], data[0], seed)
+
+	def copy(self):
+		# cards are immutable, so copying the pile lists is enough
+		game_handler = self.__class__.__new__(self.__class__)
+		game_handler.seed = self.seed
+		game_handler.draw_count = self.draw_count
+		game_handler.stock = self.stock[:]
+		game_handler.cursor = self.cursor
+		game_handler.ace_piles = {suit: ace_pile[:] for suit, ace_pile
+								  in self.ace_piles.items()}
+		game_handler.columns = [column[:] for column in self.columns]
+		game_handler._move_index = dict(self._move_index)
+		game_handler._legal_moves = self._legal_moves
+		game_handler._dirty_piles = set(self._dirty_piles)
+		game_handler._hash = self._hash
+		game_handler.face_down_count = self.face_down_count
+		game_handler._history = self._history[:]
+		game_handler._redo = self._redo[:]
+		game_handler.debug = self.debug
+		# copies are scratch positions, so they are never recorded
+		game_handler.recorder = None
+		return game_handler
+
+	# --- deck and discard views ---
+
+	@property
+	def deck(self):
+		# face-down, top card last
+		return self.stock[self.cursor:][::-1]
+
+	@deck.setter
+	def deck(self, cards):
+		self.stock = self.stock[:self.cursor] + [CARDS[card.ordinal]
+												 for card in reversed(cards)]
+
+	@property
+	def discard(self):
+		# face-up, top card last
+		return [card.flip() for card in self.stock[:self.cursor]]
+
+	@discard.setter
+	def discard(self, cards):
+		self.stock = ([CARDS[card.ordinal] for card in cards] +
+					  self.stock[self.cursor:])
+		self.cursor = len(cards)
+
+	def discard_top(self):
+		return self.stock[self.cursor - 1].flip() if self.cursor else None
+
+	def is_won(self):
+		for ace_pile in self.ace_piles.values():
+			if len(ace_pile) < len(Card.VALUES):
+				return False
+		return True
+
+	def score(self):
+		# points for the moves still in the journal, so undone moves don't
+		# count
+		score = 0
+		for entry in self._history:
+			score += MOVE_SCORES.get(entry.move.kind, 0)
+			if entry.flipped:
+				score += FLIP_SCORE
+		return score
+
+	def count_face_down(self):
+		# face-down cards in the columns. face_down_count keeps this up to
+		# date as cards are turned over
+		return sum(not card.face_up for column in self.columns for card in column)
+
+	def can_auto_finish(self):
+		# with every column card face up, the lowest card left is always on
+		# top of a column or in the stock, so playing the cards up in order
+		# of value wins when drawing one at a time. drawing several at a
+		# time can keep a card out of reach, so the stock has to be empty
+		return self.face_down_count == 0 and (self.draw_count == 1 or not self.stock)
+
+	def should_auto_finish(self):
+		# only when the game isn't won and nothing is waiting to be redone.
+		# after an undo the player is stepping back through the game, and
+		# finishing would replay the undone moves
+		return self.can_auto_finish() and not self.is_won() and not self._redo
+
+	def finishing_moves(self):
+		# the moves that win the game from here, worked out in one pass
+		# without touching the piles. None if it can't be auto finished
+		if not self.can_auto_finish():
+			return None
+		columns_by_ordinal = {card.ordinal: i for i, column in enumerate(self.columns)
+							  for card in column}
+		stock = self.stock[:]
+		cursor = self.cursor
+		moves = []
+		for value in Card.VALUES:
+			for suit in SUIT_ORDER:
+				if len(self.ace_piles[suit]) >= value:
+					continue
+				card = Card(value, suit)
+				if card.ordinal in columns_by_ordinal:
+					moves.append(Move(COLUMN_TO_ACE_PILE, columns_by_ordinal[card.ordinal]))
+					continue
+				# draw until the card is on top of the discard
+				index = stock.index(card)
+				while cursor != index + 1:
+					cursor = 1 if cursor == len(stock) else cursor + 1
+					moves.append(Move(DRAW))
+				moves.append(Move(DISCARD_TO_ACE_PILE))
+				del stock[index]
+				cursor = index
+		return moves
+
+	def auto_finish(self):
+		# plays the finishing moves, which can be undone like any others.
+		# returns them, or None if the game can't be auto finished
+		moves = self.finishing_moves()
+		if moves is not None:
+			for move in moves:
+				self.apply(move)
+		return moves
+
+	def position_hash(self):
+		return self._hash
+
+	def compute_hash(self):
+		value = zobrist_pile(STOCK_LOCATION, self.stock)
+		value ^= ZOBRIST_CURSOR_KEYS[self.cursor]
+		for suit, ace_pile in self.ace_piles.items():
+			value ^= zobrist_pile(ACE_PILE_LOCATIONS[suit], ace_pile)
+		for i, column in enumerate(self.columns):
+			value ^= zobrist_pile(COLUMN_LOCATION + i, column)
+		return value
 
 	def draw(self):
-		if not self.deck:
-			self.deck = [card.flip() for card in self.discard[::-1]]
-			self.discard = []
-		self.discard.append(self.deck.pop().flip())
+		# turns over draw_count cards, recycling the discard once the deck
+		# runs out. both only move the stock cursor
+		if not self.stock:
+			raise IllegalMoveError
+		cursor = self.cursor
+		recycled = cursor == len(self.stock)
+		new_cursor = min((0 if recycled else cursor) + self.draw_count,
+						 len(self.stock))
+		self._set_cursor(new_cursor)
+		self._record(Move(DRAW), recycled=recycled, cursor=cursor)
+		self._touch(self.DISCARD)
 
 	def discard_to_ace_pile(self):
-		self._to_ace_pile(self.discard)
+		card = self.discard_top()
+		if card is None:
+			raise IllegalMoveError
+		ace_pile = self.ace_piles[card.suit]
+		if not self._can_add_to_ace_pile(card, ace_pile):
+			raise IllegalMoveError
+		self._push(ace_pile, ACE_PILE_LOCATIONS[card.suit], self._pop_discard())
+		self._record(Move(DISCARD_TO_ACE_PILE), suit=card.suit)
+		self._touch(self.DISCARD, self.ACE_PILES)
 
 	def discard_to_column(self, column_index):
-		if not self.discard:
+		card = self.discard_top()
+		if card is None:
 			raise IllegalMoveError
-		card = self.discard[-1]
 		column = self.columns[column_index]
 		if not self._can_add_to_column(card, column):
 			raise IllegalMoveError
-		column.append(self.discard.pop())
+		self._push(column, COLUMN_LOCATION + column_index, self._pop_discard())
+		self._record(Move(DISCARD_TO_COLUMN, dest=column_index))
+		self._touch(self.DISCARD, column_index)
 
 	def column_to_ace_pile(self, column_index):
 		column = self.columns[column_index]
-		self._to_ace_pile(column)
-		if column and not column[-1].face_up:
-			column[-1].flip()
+		if not column:
+			raise IllegalMoveError
+		card = column[-1]
+		ace_pile = self.ace_piles[card.suit]
+		if not self._can_add_to_ace_pile(card, ace_pile):
+			raise IllegalMoveError
+		self._transfer(column, COLUMN_LOCATION + column_index,
+					   ace_pile, ACE_PILE_LOCATIONS[card.suit])
+		flipped = self._flip_top(column_index)
+		self._record(Move(COLUMN_TO_ACE_PILE, column_index), flipped,
+					 suit=card.suit)
+		self._touch(column_index, self.ACE_PILES)
 
 	def column_to_column(self, start_index, end_index, num_cards=1):
-		column_snapshot = self.columns[start_index]
-		if not column_snapshot:
+		start_column = self.columns[start_index]
+		if not start_column or num_cards < 1:
+			raise IllegalMoveError
+		num_cards = min(num_cards, len(start_column))
+		if not start_column[-num_cards].face_up:
 			raise IllegalMoveError
-		card_slice = column_snapshot[-num_cards:]
 		end_column = self.columns[end_index]
-		if not self._can_add_to_column(card_slice[0], end_column):
+		if not self._can_add_to_column(start_column[-num_cards], end_column):
 			raise IllegalMoveError
-		self.columns[start_index] = column_snapshot[:-num_cards]
-		for card in card_slice:
-			end_column.append(card)
-		start_column = self.columns[start_index]
-		if start_column and not start_column[-1].face_up:
-			start_column[-1].flip()
+		self._transfer(start_column, COLUMN_LOCATION + start_index,
+					   end_column, COLUMN_LOCATION + end_index,
+					   num_cards)
+		flipped = self._flip_top(start_index)
+		self._record(Move(COLUMN_TO_COLUMN, start_index, end_index, num_cards),
+					 flipped)
+		self._touch(start_index, end_index)
+
+	# --- undo / redo ---
+
+	def can_undo(self):
+		return bool(self._history)
+
+	def can_redo(self):
+		return bool(self._redo)
 
-	def _to_ace_pile(self, origin_list):
-		if not origin_list:
+	def undo(self):
+		# reverses the last move in O(k) for a k card move
+		if not self._history:
 			raise IllegalMoveError
-		card = origin_list[-1]
-		ace_pile = self.ace_piles[card.suit]
-		if not self._can_add_to_ace_pile(card, ace_pile):
+		entry = self._history.pop()
+		move = entry.move
+		if self.recorder is not None:
+			self.recorder.record_undo()
+		if move.kind == DRAW:
+			self._set_cursor(entry.cursor)
+			self._touch(self.DISCARD)
+		elif move.kind == DISCARD_TO_ACE_PILE:
+			ace_pile = self.ace_piles[entry.suit]
+			self._push_discard(self._pop(ace_pile, ACE_PILE_LOCATIONS[entry.suit]))
+			self._touch(self.DISCARD, self.ACE_PILES)
+		elif move.kind == DISCARD_TO_COLUMN:
+			column = self.columns[move.dest]
+			self._push_discard(self._pop(column, COLUMN_LOCATION + move.dest))
+			self._touch(self.DISCARD, move.dest)
+		elif move.kind == COLUMN_TO_ACE_PILE:
+			if entry.flipped:
+				self._turn_top(move.source)
+			self._transfer(self.ace_piles[entry.suit], ACE_PILE_LOCATIONS[entry.suit],
+						   self.columns[move.source], COLUMN_LOCATION + move.source)
+			self._touch(move.source, self.ACE_PILES)
+		else:
+			if entry.flipped:
+				self._turn_top(move.source)
+			self._transfer(self.columns[move.dest], COLUMN_LOCATION + move.dest,
+						   self.columns[move.source], COLUMN_LOCATION + move.source,
+						   move.num_cards)
+			self._touch(move.source, move.dest)
+		self._redo.append(move)
+		return move
+
+	def redo(self):
+		if not self._redo:
 			raise IllegalMoveError
-		ace_pile.append(origin_list.pop())
+		redo = self._redo
+		move = redo.pop()
+		self.apply(move)
+		self._redo = redo
+		return move
+
+	def history(self):
+		return [entry.move for entry in self._history]
+
+	def last_entry(self):
+		# the JournalEntry of the last move, or None before any move
+		return self._history[-1] if self._history else None
+
+	def _record(self, move, flipped=False, recycled=False, cursor=None, suit=None):
+		self._history.append(JournalEntry(move, flipped, recycled, cursor, suit))
+		if self.recorder is not None:
+			self.recorder.record(move)
+		if self._redo:
+			self._redo = []
+
+	# --- pile primitives, which keep the position hash in step ---
+
+	def _set_cursor(self, cursor):
+		self._hash ^= ZOBRIST_CURSOR_KEYS[self.cursor] ^ ZOBRIST_CURSOR_KEYS[cursor]
+		self.cursor = cursor
+
+	def _pop_discard(self):
+		# removing a card shifts the deck cards after it, so their keys are
+		# rehashed
+		index = self.cursor - 1
+		self._hash ^= zobrist_pile(STOCK_LOCATION, self.stock, index)
+		card = self.stock.pop(index)
+		self._hash ^= zobrist_pile(STOCK_LOCATION, self.stock, index)
+		self._set_cursor(index)
+		return card.flip()
+
+	def _push_discard(self, card):
+		index = self.cursor
+		self._hash ^= zobrist_pile(STOCK_LOCATION, self.stock, index)
+		self.stock.insert(index, CARDS[card.ordinal])
+		self._hash ^= zobrist_pile(STOCK_LOCATION, self.stock, index)
+		self._set_cursor(index + 1)
+
+	def _push(self, pile, location, card):
+		self._hash ^= zobrist_key(location, len(pile), card)
+		pile.append(card)
+
+	def _pop(self, pile, location):
+		card = pile.pop()
+		self._hash ^= zobrist_key(location, len(pile), card)
+		return card
+
+	def _transfer(self, origin, origin_location, dest, dest_location, num_cards=1):
+		# moves the top num_cards cards of origin onto dest, in order
+		start = len(origin) - num_cards
+		self._hash ^= zobrist_pile(origin_location, origin, start)
+		depth = len(dest)
+		dest.extend(origin[start:])
+		del origin[start:]
+		self._hash ^= zobrist_pile(dest_location, dest, depth)
+
+	def _flip_top(self, column_index):
+		column = self.columns[column_index]
+		if column and not column[-1].face_up:
+			self._turn_top(column_index)
+			return True
+		return False
+
+	def _turn_top(self, column_index):
+		column = self.columns[column_index]
+		location = COLUMN_LOCATION + column_index
+		self._hash ^= zobrist_key(location, len(column) - 1, column[-1])
+		column[-1] = column[-1].flip()
+		self._hash ^= zobrist_key(location, len(column) - 1, column[-1])
+		self.face_down_count += -1 if column[-1].face_up else 1
+
+	# --- move generation ---
+
+	def legal_moves(self):
+		if self._legal_moves is None:
+			for pile in self._dirty_piles:
+				for pair in PAIRS_BY_PILE[pile]:
+					self._move_index[pair] = self._moves_between(*pair)
+			self._dirty_piles.clear()
+			moves = [Move(DRAW)] if self.stock else []
+			for pair_moves in self._move_index.values():
+				moves.extend(pair_moves)
+			self._legal_moves = tuple(moves)
+		return self._legal_moves
+
+	def apply(self, move):
+		method = getattr(self, move.kind)
+		if move.kind == DRAW or move.kind == DISCARD_TO_ACE_PILE:
+			method()
+		elif move.kind == DISCARD_TO_COLUMN:
+			method(move.dest)
+		elif move.kind == COLUMN_TO_ACE_PILE:
+			method(move.source)
+		else:
+			method(move.source, move.dest, move.num_cards)
+
+	def _touch(self, *piles):
+		self._dirty_piles.update(piles)
+		self._legal_moves = None
+		if self.debug:
+			if self._hash != self.compute_hash():
+				raise AssertionError("incremental position hash is out of sync")
+			if self.face_down_count != self.count_face_down():
+				raise AssertionError("face-down card count is out of sync")
+
+	def _moves_between(self, source, dest):
+		if source == self.DISCARD:
+			card = self.discard_top()
+			if card is None:
+				return ()
+			if dest == self.ACE_PILES:
+				if self._can_add_to_ace_pile(card, self.ace_piles[card.suit]):
+					return (Move(DISCARD_TO_ACE_PILE),)
+			elif self._can_add_to_column(card, self.columns[dest]):
+				return (Move(DISCARD_TO_COLUMN, dest=dest),)
+			return ()
+
+		column = self.columns[source]
+		if not column:
+			return ()
+		if dest == self.ACE_PILES:
+			card = column[-1]
+			if self._can_add_to_ace_pile(card, self.ace_piles[card.suit]):
+				return (Move(COLUMN_TO_ACE_PILE, source),)
+			return ()
+		end_column = self.columns[dest]
+		if end_column:
+			# the face-up cards of a column always form a run, so only the
+			# card one below the destination's top value can fit
+			num_cards = end_column[-1].value - column[-1].value
+			if 0 < num_cards <= len(column) and column[-num_cards].face_up:
+				if self._can_add_to_column(column[-num_cards], end_column):
+					return (Move(COLUMN_TO_COLUMN, source, dest, num_cards),)
+			return ()
+		moves = []
+		num_cards = 1
+		while num_cards <= len(column) and column[-num_cards].face_up:
+			if self._can_add_to_column(column[-num_cards], end_column):
+				moves.append(Move(COLUMN_TO_COLUMN, source, dest, num_cards))
+			num_cards += 1
+		return tuple(moves)
 
 	# --- validators ---
 
 	def _can_add_to_ace_pile(self, card, ace_pile):
-		if not ace_pile:
-			# ace can be added to empty pile
-			return card.value == 1
-		top_card = ace_pile[-1]
-		return card.value == top_card.value + 1
+		return CAN_STACK_ON_ACE_PILE[card.ordinal][
+			ace_pile[-1].ordinal if ace_pile else EMPTY_PILE]
 
 	def _can_add_to_column(self, card, column):
-		if not column:
-			# king can be added to empty column
-			return card.value == 13
-		top_card = column[-1]
-		correct_color = card.is_red != top_card.is_red
-		correct_value = card.value == top_card.value - 1
-		return correct_value and correct_color
+		return CAN_STACK_ON_COLUMN[card.ordinal][
+			column[-1].ordinal if column else EMPTY_PILE]
+
+# the stock, the ace piles in SUIT_ORDER then the columns
+NUM_PILES = 1 + len(SUIT_ORDER) + GameHandler.COLUMNS
+
+
+def pack_piles(game_handler):
+	# every pile as a length byte followed by one card code per card. codes
+	# carry the face-up flag
+	piles = ([game_handler.stock] +
+			 [game_handler.ace_piles[suit] for suit in SUIT_ORDER] +
+			 game_handler.columns)
+	return b"".join(bytes([len(pile)] + [card.code for card in pile]) for pile in piles)
+
+
+def unpack_piles(data, offset=0):
+	# the piles packed at offset, and the offset just past them. codes that
+	# aren't cards come back as None
+	piles = []
+	for _ in range(NUM_PILES):
+		length = data[offset]
+		piles.append([CARDS_BY_CODE[code] for code in data[offset + 1:offset + 1 + length]])
+		offset += 1 + length
+	return piles, offset
+
+
+PAIRS_BY_PILE = {}
+for _pair in GameHandler.MOVE_PAIRS:
+	for _pile in _pair:
+		PAIRS_BY_PILE.setdefault(_pile, []).append(_pair)
+
+_zobrist_random = Random(0x5eed)
+ZOBRIST_KEYS = [_zobrist_random.getrandbits(64) for _ in
+				range((COLUMN_LOCATION + GameHandler.COLUMNS) *
+					  MAX_PILE_SIZE * FACE_UP * 2)]
+ZOBRIST_CURSOR_KEYS = [_zobrist_random.getrandbits(64)
+					   for _ in range(MAX_PILE_SIZE + 1)]
 
 
 class IllegalMoveError(Exception):
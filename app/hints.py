@@ -0,0 +1,98 @@
+from time import perf_counter
+from .solver import *
+
+
+# evaluation weights. a card on an ace pile is worth more than a card
+# turned over, and every move costs a little so shorter lines win ties
+ACE_PILE_CARD_VALUE = 10
+FACE_DOWN_CARD_VALUE = 8
+MOVE_COST = 1
+WIN_VALUE = 10000
+
+
+def evaluate(game_handler):
+	if game_handler.is_won():
+		return WIN_VALUE
+	value = 0
+	for ace_pile in game_handler.ace_piles.values():
+		value += len(ace_pile) * ACE_PILE_CARD_VALUE
+	return value - game_handler.face_down_count * FACE_DOWN_CARD_VALUE
+
+
+class HintEngine:
+	# suggests a move by iterative deepening within a time budget, keeping
+	# the best move of the deepest search that finished. searched positions
+	# are cached by position hash for the rest of the game, so asking again
+	# after a move or two mostly reuses earlier work
+	def __init__(self, budget=0.05, max_depth=24, max_cache_entries=200000):
+		self.budget = budget
+		self.max_depth = max_depth
+		self.max_cache_entries = max_cache_entries
+		self.nodes_expanded = 0
+		self.cache_hits = 0
+		self.depth_reached = 0
+		self._seed = None
+		# position hash -> (depth, value, best move)
+		self._cache = {}
+
+	def hint(self, game_handler):
+		# returns None when there is no move to make
+		self._deadline = perf_counter() + self.budget
+		if game_handler.seed != self._seed:
+			self._seed = game_handler.seed
+			self._cache.clear()
+		finish = game_handler.finishing_moves()
+		if finish:
+			return finish[0]
+		game_handler = game_handler.copy()
+		best_move = None
+		self.depth_reached = 0
+		for depth in range(1, self.max_depth + 1):
+			try:
+				_, move = self._search(game_handler, depth)
+			except _OutOfTime:
+				break
+			best_move = move
+			self.depth_reached = depth
+		if best_move is None:
+			# not even one ply fit in the budget
+			moves = ordered_moves(game_handler)
+			best_move = moves[0] if moves else None
+		return best_move
+
+	def _search(self, game_handler, depth):
+		# the best value reachable within depth moves, and the move leading
+		# to it
+		if perf_counter() > self._deadline:
+			raise _OutOfTime
+		key = game_handler.position_hash()
+		entry = self._cache.get(key)
+		if entry is not None and entry[0] >= depth:
+			self.cache_hits += 1
+			return entry[1], entry[2]
+		self.nodes_expanded += 1
+
+		moves = ordered_moves(game_handler) if depth else []
+		if not moves or game_handler.is_won():
+			value, best_move = evaluate(game_handler), None
+		else:
+			# the best move found by a shallower search goes first
+			if entry is not None and entry[2] in moves:
+				moves.remove(entry[2])
+				moves.insert(0, entry[2])
+			value, best_move = None, None
+			for move in moves:
+				game_handler.apply(move)
+				child_value = self._search(game_handler, depth - 1)[0] - MOVE_COST
+				game_handler.undo()
+				if value is None or child_value > value:
+					value, best_move = child_value, move
+
+		if len(self._cache) >= self.max_cache_entries:
+			self._cache.clear()
+		self._cache[key] = (depth, value, best_move)
+		return value, best_move
+
+
+class _OutOfTime(Exception):
+	pass
\ No newline at end of file
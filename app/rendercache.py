@@ -0,0 +1,120 @@
+from .card import *
+
+
+# rows are (y, x, text, style) tuples. styles are names rather than curses
+# attributes so the cached rows can be shared by any renderer
+FG = "fg"
+RED = "red"
+SELECT = "select"
+PLAIN = None
+
+TOP_BORDER = Card.TL_CORNER + (Card.H_LINE * (Card.WIDTH - 2)) + Card.TR_CORNER
+BOTTOM_BORDER = Card.BL_CORNER + (Card.H_LINE * (Card.WIDTH - 2)) + Card.BR_CORNER
+
+EMPTY_COLUMN_ROWS = (
+	(0, 0, Card.TL_CORNER, PLAIN),
+	(0, Card.WIDTH - 1, Card.TR_CORNER, PLAIN),
+	(Card.HEIGHT - 1, 0, Card.BL_CORNER, PLAIN),
+	(Card.HEIGHT - 1, Card.WIDTH - 1, Card.BR_CORNER, PLAIN)
+)
+
+
+class RenderCache:
+	# precomputed rows for card faces and whole column layouts. columns are
+	# keyed by their layout signature, the encoded cards plus the number of
+	# selected cards
+	def __init__(self, max_entries=4096):
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._faces = {}
+		self._columns = {}
+
+	@property
+	def hit_rate(self):
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+	def face_rows(self, card):
+		# the top-left and bottom-right labels of a flat card. they are the
+		# same face up or down and selected or not, so only the card is a key
+		key = card.ordinal
+		rows = self._faces.get(key)
+		if rows is None:
+			self.misses += 1
+			style = RED if card.is_red else FG
+			top_display = card.suit_symbol + card.display_value
+			bottom_display = card.display_value + card.suit_symbol
+			rows = (
+				(1, 1, top_display, style),
+				(Card.HEIGHT - 2,
+				 Card.WIDTH - len(bottom_display) - 1,
+				 bottom_display,
+				 style)
+			)
+			self._faces[key] = rows
+		else:
+			self.hits += 1
+		return rows
+
+	def column_rows(self, column, num_selected=0):
+		key = bytes([card.code for card in column] + [num_selected])
+		rows = self._columns.get(key)
+		if rows is None:
+			self.misses += 1
+			if len(self._columns) >= self.max_entries:
+				self._columns.clear()
+			rows = self._layout_column(column, num_selected)
+			self._columns[key] = rows
+		else:
+			self.hits += 1
+		return rows
+
+	def _layout_column(self, column, num_selected):
+		if not column:
+			return EMPTY_COLUMN_ROWS
+		rows = []
+		running_y = 0
+		for card in column:
+			rows.append((running_y, 0, TOP_BORDER, PLAIN))
+			running_y += 1
+			if card.face_up:
+				rows.extend(_line_borders(running_y, FG))
+				style = RED if card.is_red else FG
+				rows.append((running_y, 1, card.suit_symbol + card.display_value, style))
+				running_y += 1
+		for _ in range(Card.HEIGHT - 4):
+			rows.extend(_line_borders(running_y, FG))
+			running_y += 1
+		top_card = column[-1]
+		bottom_display = top_card.display_value + top_card.suit_symbol
+		rows.extend(_line_borders(running_y, FG))
+		rows.append((running_y,
+					 Card.WIDTH - len(bottom_display) - 1,
+					 bottom_display,
+					 RED if top_card.is_red else FG))
+		rows.append((running_y + 1, 0, BOTTOM_BORDER, PLAIN))
+
+		if num_selected:
+			# highlight the selected cards' outline, working up from the
+			# bottom border
+			running_y += 1
+			rows.append((running_y, 0, BOTTOM_BORDER, SELECT))
+			running_y -= 1
+			for _ in range(Card.HEIGHT - 2):
+				rows.extend(_line_borders(running_y, SELECT))
+				running_y -= 1
+			for _ in range(1, num_selected):
+				rows.extend(_line_borders(running_y, SELECT))
+				rows.extend(_line_borders(running_y - 1, SELECT))
+				running_y -= 2
+			rows.append((running_y, 0, TOP_BORDER, SELECT))
+		return tuple(rows)
+
+
+def _line_borders(y, style):
+	return ((y, 0, Card.V_LINE, style), (y, Card.WIDTH - 1, Card.V_LINE, style))
+
+
+# render rows are immutable, so one cache is shared by every ui
+RENDER_CACHE = RenderCache()
\ No newline at end of file
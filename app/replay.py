@@ -0,0 +1,169 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from .gamehandler import *
+
+
+# a replay log is a 4 byte file header followed by 16-bit little-endian
+# words. a move is one word:
+#   bits 0-2    kind, an index into MOVE_KINDS
+#   bits 3-6    source column, NO_PILE for none
+#   bits 7-10   dest column, NO_PILE for none
+#   bits 11-15  number of cards
+# kind UNDO is an undo. kind START begins a game, with the draw count in
+# the number of cards bits, followed by the deal seed as four words
+MAGIC = b"SRL"
+FORMAT_VERSION = 1
+HEADER = MAGIC + bytes([FORMAT_VERSION])
+
+UNDO = 5
+START = 7
+NO_PILE = 0xf
+SEED = struct.Struct("<Q")
+SEED_WORDS = SEED.size // 2
+
+ReplayedGame = namedtuple("ReplayedGame", ["seed", "draw_count", "moves", "undos",
+										   "won", "position_hash"])
+
+
+def encode_move(move):
+	source = NO_PILE if move.source is None else move.source
+	dest = NO_PILE if move.dest is None else move.dest
+	return (MOVE_KINDS.index(move.kind) | source << 3 | dest << 7 |
+			move.num_cards << 11)
+
+
+def _possible_moves():
+	yield Move(DRAW)
+	yield Move(DISCARD_TO_ACE_PILE)
+	for column in range(GameHandler.COLUMNS):
+		yield Move(DISCARD_TO_COLUMN, dest=column)
+		yield Move(COLUMN_TO_ACE_PILE, column)
+		for dest in range(GameHandler.COLUMNS):
+			for num_cards in range(1, len(Card.VALUES) + 1):
+				yield Move(COLUMN_TO_COLUMN, column, dest, num_cards)
+
+
+# every move the log can hold, so encoding and decoding are lookups
+MOVE_WORDS = {move: encode_move(move) for move in _possible_moves()}
+WORD_MOVES = {word: move for move, word in MOVE_WORDS.items()}
+
+
+class ReplayWriter:
+	# streams the games played on a GameHandler to an append-only log, e.g.
+	# GameHandler(recorder=ReplayWriter(path)). every game is flushed as it
+	# starts, so at most the moves of the current game are buffered
+	def __init__(self, path):
+		self._file = open(path, "ab")
+		if self._file.tell() == 0:
+			self._file.write(HEADER)
+
+	def start_game(self, seed, draw_count):
+		self._file.write(struct.pack("<H", START | draw_count << 11) + SEED.pack(seed))
+		self._file.flush()
+
+	def record(self, move):
+		word = MOVE_WORDS[move]
+		self._file.write(bytes((word & 0xff, word >> 8)))
+
+	def record_undo(self):
+		self._file.write(bytes((UNDO, 0)))
+
+	def close(self):
+		self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+
+def replay_file(path, validate=False):
+	# replays every game in a log file, reading it through mmap rather than
+	# loading it whole
+	with open(path, "rb") as f:
+		if not f.seek(0, 2):
+			raise ReplayError("empty replay log")
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			# results are built as the log is read, so finish reading
+			# before the map is closed
+			return list(replay(data, validate))
+
+
+def replay(data, validate=False):
+	# yields a ReplayedGame per game in a log buffer. without validation
+	# the moves go straight to GameHandler, which only checks what its move
+	# methods check anyway. with validation every move is checked against
+	# the legal moves and the incremental state is recomputed after each
+	# one, so a log from a buggy or tampered build is caught. a record cut
+	# short by an interrupted writer is ignored
+	if bytes(data[:len(HEADER)]) != HEADER:
+		raise ReplayError("not a replay log, or an unsupported version")
+	body = memoryview(data)[len(HEADER):]
+	body = body[:len(body) - len(body) % 2]
+	if sys.byteorder == "little":
+		words = body.cast("H")
+	else:
+		words = array("H", body.tobytes())
+		words.byteswap()
+	try:
+		yield from _replay_words(words, body, validate)
+	finally:
+		# views of an mmap have to be released before it can be closed
+		if isinstance(words, memoryview):
+			words.release()
+		body.release()
+
+
+def _replay_words(words, body, validate):
+	game_handler = None
+	game_index = -1
+	index = 0
+	while index < len(words):
+		word = words[index]
+		index += 1
+		if word & 7 == START:
+			if game_handler is not None:
+				yield _result(game_handler, num_moves, num_undos)
+				game_handler = None
+			if index + SEED_WORDS > len(words):
+				return
+			(seed,) = SEED.unpack_from(body, index * 2)
+			index += SEED_WORDS
+			game_handler = GameHandler(seed, word >> 11, debug=validate)
+			game_index += 1
+			num_moves = 0
+			num_undos = 0
+			continue
+		if game_handler is None:
+			raise ReplayError("replay log doesn't start with a game")
+		try:
+			if word == UNDO:
+				game_handler.undo()
+				num_undos += 1
+				continue
+			move = WORD_MOVES.get(word)
+			if move is None:
+				raise ReplayError("game %d: bad move word %#06x" % (game_index, word))
+			if validate and move not in game_handler.legal_moves():
+				raise IllegalMoveError
+			game_handler.apply(move)
+			num_moves += 1
+		except (IllegalMoveError, AssertionError):
+			raise ReplayError("game %d, word %d: %s can't be replayed" % (
+				game_index, index - 1, "undo" if word == UNDO else str(move)))
+	if game_handler is not None:
+		yield _result(game_handler, num_moves, num_undos)
+
+
+def _result(game_handler, num_moves, num_undos):
+	return ReplayedGame(game_handler.seed, game_handler.draw_count, num_moves,
+						num_undos, game_handler.is_won(),
+						game_handler.position_hash())
+
+
+class ReplayError(Exception):
+	pass
\ No newline at end of file
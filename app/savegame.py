@@ -0,0 +1,152 @@
+import struct
+from zlib import crc32
+from .gamehandler import *
+
+
+# a saved game is one record:
+#   header     magic, format version, seed, draw count, stock cursor
+#   piles      the stock, the four ace piles in SUIT_ORDER then the columns,
+#              each a length byte followed by one card code per card. card
+#              codes carry the face-up flag
+#   history    journal entry count then JOURNAL_ENTRY per entry, followed by
+#              the redo count then MOVE_RECORD per move
+#   checksum   crc32 of everything before it
+# records are self-delimiting, so many games can be saved back to back
+MAGIC = b"SOL"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<3sBQBB")
+COUNT = struct.Struct("<H")
+# kind index, source, dest, num_cards. NONE stands in for a missing field
+MOVE_RECORD = struct.Struct("<BBBB")
+# a move record plus flags (1 flipped, 2 recycled), cursor and suit index
+JOURNAL_ENTRY = struct.Struct("<BBBBBBB")
+CHECKSUM = struct.Struct("<I")
+
+NONE = 0xff
+FLIPPED = 1
+RECYCLED = 2
+
+
+def save_game(game_handler):
+	try:
+		parts = [HEADER.pack(MAGIC, FORMAT_VERSION, game_handler.seed,
+							 game_handler.draw_count, game_handler.cursor)]
+		parts.append(pack_piles(game_handler))
+		parts.append(COUNT.pack(len(game_handler._history)))
+		for entry in game_handler._history:
+			flags = (FLIPPED if entry.flipped else 0) | (RECYCLED if entry.recycled else 0)
+			parts.append(JOURNAL_ENTRY.pack(*_pack_move(entry.move), flags,
+											_or_none(entry.cursor),
+											NONE if entry.suit is None else SUIT_ORDER.index(entry.suit)))
+		parts.append(COUNT.pack(len(game_handler._redo)))
+		for move in game_handler._redo:
+			parts.append(MOVE_RECORD.pack(*_pack_move(move)))
+	except (struct.error, ValueError) as e:
+		raise SaveGameError("game can't be saved: %s" % e)
+	data = b"".join(parts)
+	return data + CHECKSUM.pack(crc32(data))
+
+
+def load_game(data):
+	game_handler, offset = read_game(data)
+	if offset != len(data):
+		raise SaveGameError("trailing data after saved game")
+	return game_handler
+
+
+def save_games(game_handlers):
+	return b"".join(save_game(game_handler) for game_handler in game_handlers)
+
+
+def load_games(data):
+	# yields every game saved back to back in data
+	offset = 0
+	while offset < len(data):
+		game_handler, offset = read_game(data, offset)
+		yield game_handler
+
+
+def write_game(game_handler, path):
+	with open(path, "wb") as f:
+		f.write(save_game(game_handler))
+
+
+def read_game_file(path):
+	with open(path, "rb") as f:
+		return load_game(f.read())
+
+
+def read_game(data, offset=0):
+	# builds the game straight from the record at offset, without dealing a
+	# new one. returns the game and the offset just past the record
+	data = memoryview(data)
+	start = offset
+	try:
+		magic, version, seed, draw_count, cursor = HEADER.unpack_from(data, offset)
+		if magic != MAGIC:
+			raise SaveGameError("not a saved game")
+		if version != FORMAT_VERSION:
+			raise SaveGameError("unsupported save format version %d" % version)
+		offset += HEADER.size
+
+		piles, offset = unpack_piles(data, offset)
+
+		history = []
+		(count,) = COUNT.unpack_from(data, offset)
+		offset += COUNT.size
+		for _ in range(count):
+			fields = JOURNAL_ENTRY.unpack_from(data, offset)
+			offset += JOURNAL_ENTRY.size
+			flags, entry_cursor, suit_index = fields[4:]
+			history.append(JournalEntry(_unpack_move(fields[:4]),
+										bool(flags & FLIPPED),
+										bool(flags & RECYCLED),
+										_none_or(entry_cursor),
+										None if suit_index == NONE else SUIT_ORDER[suit_index]))
+		redo = []
+		(count,) = COUNT.unpack_from(data, offset)
+		offset += COUNT.size
+		for _ in range(count):
+			redo.append(_unpack_move(MOVE_RECORD.unpack_from(data, offset)))
+			offset += MOVE_RECORD.size
+
+		(checksum,) = CHECKSUM.unpack_from(data, offset)
+	except (struct.error, IndexError, KeyError):
+		raise SaveGameError("saved game is truncated or corrupt")
+	if checksum != crc32(data[start:offset]):
+		raise SaveGameError("saved game checksum doesn't match")
+	# every card exactly once, and no codes that aren't cards
+	cards = [card for pile in piles for card in pile]
+	if (None in cards or len(cards) != len(CARDS) or
+			len({card.ordinal for card in cards}) != len(CARDS)):
+		raise SaveGameError("saved game doesn't hold a full deck")
+	if cursor > len(piles[0]) or draw_count not in DRAW_COUNTS:
+		raise SaveGameError("saved game is inconsistent")
+
+	game_handler = GameHandler.from_piles(piles, cursor, draw_count, seed)
+	game_handler._history = history
+	game_handler._redo = redo
+	return game_handler, offset + CHECKSUM.size
+
+
+def _pack_move(move):
+	return (MOVE_KINDS.index(move.kind), _or_none(move.source),
+			_or_none(move.dest), move.num_cards)
+
+
+def _unpack_move(fields):
+	kind, source, dest, num_cards = fields
+	return Move(MOVE_KINDS[kind], _none_or(source), _none_or(dest), num_cards)
+
+
+def _or_none(value):
+	return NONE if value is None else value
+
+
+def _none_or(value):
+	return None if value == NONE else value
+
+
+class SaveGameError(Exception):
+	pass
\ No newline at end of file
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import tracemalloc
+from collections import deque
+from time import perf_counter
+from .frames import *
+from .hints import *
+
+
+# line protocol: the client sends one command per line and every reply is a
+# status line ("ok", "won" or "error ...") followed by any output lines and
+# a line holding just ".". output lines starting with "." get another "."
+# prepended, as in smtp
+HELP = [
+	"draw                 turn over the next card",
+	"da                   discard to ace pile",
+	"dc COLUMN            discard to column",
+	"ca COLUMN            column to ace pile",
+	"cc FROM TO [CARDS]   column to column",
+	"undo, redo           take back or replay a move",
+	"hint                 suggest a move",
+	"new [DEAL]           start a new game",
+	"show                 show the game",
+	"stats                server stats as json",
+	"quit                 leave"
+]
+END = "."
+HINT_BUDGET = 0.02
+
+
+class Session:
+	# one player's game. sessions only hold their GameHandler, everything
+	# used to draw it is shared
+
+	# commands that can take up to HINT_BUDGET, which the server runs off the
+	# event loop
+	SEARCH_COMMANDS = {"hint"}
+
+	def __init__(self, frame_builder, seed=None, draw_count=1):
+		self.frame_builder = frame_builder
+		self.game_handler = GameHandler(seed, draw_count)
+		# created on the first hint, as its cache is the largest thing a
+		# session would otherwise hold
+		self.hint_engine = None
+
+	def handle(self, line):
+		# returns the reply lines, status first, or None to close the session
+		words = line.split()
+		if not words:
+			return ["error empty command"]
+		command, args = words[0].lower(), words[1:]
+		if command == "quit":
+			return None
+		if command == "help":
+			return ["ok"] + HELP
+		method = self.COMMANDS.get(command)
+		if method is None:
+			return ["error unknown command %s, try help" % command]
+		try:
+			output = method(self, *[_column_or_count(arg) for arg in args])
+		except IllegalMoveError:
+			return ["error illegal move"] + self.frame()
+		except (TypeError, ValueError, IndexError):
+			return ["error bad arguments for %s" % command]
+		game_handler = self.game_handler
+		if game_handler.should_auto_finish():
+			game_handler.auto_finish()
+		status = "won" if game_handler.is_won() else "ok"
+		return [status] + (output or []) + self.frame()
+
+	def frame(self):
+		return self.frame_builder.build(self.game_handler)
+
+	def hint(self):
+		if self.hint_engine is None:
+			self.hint_engine = HintEngine(HINT_BUDGET, max_cache_entries=20000)
+		move = self.hint_engine.hint(self.game_handler)
+		return ["hint %s" % _describe(move) if move else "hint none"]
+
+	def column_to_column(self, start, end, num_cards=1):
+		# columns count from 0, cards from 1
+		if num_cards < 1:
+			raise ValueError
+		self.game_handler.column_to_column(start, end, num_cards)
+
+	def undo(self):
+		return ["undo %s" % _describe(self.game_handler.undo())]
+
+	def redo(self):
+		return ["redo %s" % _describe(self.game_handler.redo())]
+
+	def new(self, seed=None):
+		self.game_handler.new_game(seed)
+
+	COMMANDS = {
+		"draw": lambda self: self.game_handler.draw(),
+		"da": lambda self: self.game_handler.discard_to_ace_pile(),
+		"dc": lambda self, column: self.game_handler.discard_to_column(column),
+		"ca": lambda self, column: self.game_handler.column_to_ace_pile(column),
+		"cc": column_to_column,
+		"undo": undo,
+		"redo": redo,
+		"hint": hint,
+		"new": new,
+		"show": lambda self: None
+	}
+
+
+class LatencyStats:
+	# per message latency, from a line arriving to its reply being written.
+	# percentiles come from the most recent samples
+	def __init__(self, max_samples=10000):
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self._samples = deque(maxlen=max_samples)
+
+	def add(self, seconds):
+		self.count += 1
+		self.total += seconds
+		self.max = max(self.max, seconds)
+		self._samples.append(seconds)
+
+	def as_dict(self):
+		samples = sorted(self._samples)
+		return {
+			"messages": self.count,
+			"mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+			"p50_ms": _percentile(samples, 0.5) * 1000,
+			"p95_ms": _percentile(samples, 0.95) * 1000,
+			"p99_ms": _percentile(samples, 0.99) * 1000,
+			"max_ms": self.max * 1000
+		}
+
+
+class GameServer:
+	def __init__(self, host="127.0.0.1", port=7777, draw_count=1, max_sessions=10000):
+		self.host = host
+		self.port = port
+		self.draw_count = draw_count
+		self.max_sessions = max_sessions
+		self.frame_builder = FrameBuilder()
+		self.latency = LatencyStats()
+		self.sessions = set()
+		self.sessions_served = 0
+		self._session_bytes = None
+		self._server = None
+
+	async def start(self):
+		# measured up front, off the event loop, so the first stats command
+		# doesn't stall every session
+		loop = asyncio.get_running_loop()
+		self._session_bytes = await loop.run_in_executor(
+			None, measure_session_memory, self.frame_builder, self.draw_count)
+		self._server = await asyncio.start_server(
+			self._serve_client, self.host, self.port,
+			# a burst of clients connecting at once would overflow the default
+			backlog=max(100, min(self.max_sessions, 4096)))
+		# port 0 picks a free port
+		self.port = self._server.sockets[0].getsockname()[1]
+		return self
+
+	async def serve_forever(self):
+		async with self._server:
+			await self._server.serve_forever()
+
+	async def close(self):
+		self._server.close()
+		await self._server.wait_closed()
+
+	def stats(self):
+		return {
+			"sessions": len(self.sessions),
+			"sessions_served": self.sessions_served,
+			"session_bytes": self._session_bytes,
+			"render_cache_hit_rate": self.frame_builder.render_cache.hit_rate,
+			"latency": self.latency.as_dict()
+		}
+
+	async def _serve_client(self, reader, writer):
+		if len(self.sessions) >= self.max_sessions:
+			writer.write(_encode(["error server full"]))
+			await writer.drain()
+			writer.close()
+			return
+		session = Session(self.frame_builder, draw_count=self.draw_count)
+		loop = asyncio.get_running_loop()
+		self.sessions.add(session)
+		self.sessions_served += 1
+		try:
+			writer.write(_encode(["ok"] + session.frame()))
+			await writer.drain()
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				start = perf_counter()
+				text = line.decode("utf-8", "replace")
+				command = text.strip().lower()
+				if command == "stats":
+					reply = ["ok", json.dumps(self.stats())]
+				elif command.partition(" ")[0] in Session.SEARCH_COMMANDS:
+					# searches run on a worker thread so other sessions aren't
+					# held up. the session waits for the reply, so only its
+					# own game and the shared caches are touched meanwhile
+					reply = await loop.run_in_executor(None, session.handle, text)
+				else:
+					reply = session.handle(text)
+				if reply is None:
+					break
+				writer.write(_encode(reply))
+				await writer.drain()
+				self.latency.add(perf_counter() - start)
+		except ConnectionError:
+			pass
+		finally:
+			self.sessions.discard(session)
+			writer.close()
+
+
+def measure_session_memory(frame_builder, draw_count=1, count=100):
+	# bytes allocated per session that has drawn one frame, with the shared
+	# caches warmed up first so they aren't counted
+	Session(frame_builder, draw_count=draw_count).frame()
+	was_tracing = tracemalloc.is_tracing()
+	if not was_tracing:
+		tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	sessions = []
+	for seed in range(count):
+		session = Session(frame_builder, seed, draw_count)
+		session.frame()
+		sessions.append(session)
+	allocated = tracemalloc.get_traced_memory()[0] - before
+	if not was_tracing:
+		tracemalloc.stop()
+	return allocated // count
+
+
+async def run_load_test(num_sessions=1000, messages_per_session=20, draw_count=1):
+	# plays num_sessions clients at once against a server on a free local
+	# port, timing every round trip
+	server = await GameServer(port=0, draw_count=draw_count,
+							  max_sessions=num_sessions).start()
+	round_trips = LatencyStats(max_samples=num_sessions * messages_per_session)
+
+	async def client(seed):
+		reader, writer = await asyncio.open_connection(server.host, server.port)
+		await _read_reply(reader)
+		commands = ["new %d" % seed] + ["draw"] * (messages_per_session - 1)
+		for command in commands:
+			start = perf_counter()
+			writer.write(command.encode() + b"\n")
+			await _read_reply(reader)
+			round_trips.add(perf_counter() - start)
+		writer.write(b"quit\n")
+		writer.close()
+
+	start = perf_counter()
+	await asyncio.gather(*[client(seed) for seed in range(num_sessions)])
+	elapsed = perf_counter() - start
+	stats = server.stats()
+	await server.close()
+	stats["round_trip"] = round_trips.as_dict()
+	stats["seconds"] = elapsed
+	stats["messages_per_second"] = round_trips.count / elapsed if elapsed else 0.0
+	return stats
+
+
+async def _read_reply(reader):
+	lines = []
+	while True:
+		line = await reader.readline()
+		if not line:
+			raise ConnectionError("connection closed mid reply")
+		line = line.decode("utf-8").rstrip("\n")
+		if line == END:
+			return lines
+		lines.append(line[1:] if line.startswith("..") else line)
+
+
+def _encode(lines):
+	return "".join(["." + line + "\n" if line.startswith(".") else line + "\n"
+					for line in lines] + [END + "\n"]).encode("utf-8")
+
+
+def _column_or_count(arg):
+	value = int(arg)
+	if value < 0:
+		raise ValueError
+	return value
+
+
+def _describe(move):
+	if move.kind == DRAW:
+		return "draw"
+	if move.kind == DISCARD_TO_ACE_PILE:
+		return "da"
+	if move.kind == DISCARD_TO_COLUMN:
+		return "dc %d" % move.dest
+	if move.kind == COLUMN_TO_ACE_PILE:
+		return "ca %d" % move.source
+	return "cc %d %d %d" % (move.source, move.dest, move.num_cards)
+
+
+def _percentile(samples, fraction):
+	if not samples:
+		return 0.0
+	return samples[min(len(samples) - 1, int(len(samples) * fraction))]
\ No newline at end of file
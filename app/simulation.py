@@ -0,0 +1,162 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from importlib import import_module
+from random import Random
+from .gamehandler import *
+
+
+GameResult = namedtuple("GameResult", ["seed", "won", "moves", "stock_passes"])
+
+ACE_PILE_MOVES = (DISCARD_TO_ACE_PILE, COLUMN_TO_ACE_PILE)
+
+
+# --- policies ---
+# a policy picks one of the legal moves, or returns None to give up
+
+def random_policy(game_handler, moves, rng):
+	return rng.choice(moves) if moves else None
+
+
+def greedy_policy(game_handler, moves, rng):
+	# ace pile moves, then moves that turn over a card, then anything that
+	# isn't a draw. otherwise draw
+	ace_moves = []
+	revealing_moves = []
+	other_moves = []
+	for move in moves:
+		if move.kind in ACE_PILE_MOVES:
+			ace_moves.append(move)
+		elif move.kind == COLUMN_TO_COLUMN:
+			column = game_handler.columns[move.source]
+			if len(column) > move.num_cards and not column[-move.num_cards - 1].face_up:
+				revealing_moves.append(move)
+		elif move.kind == DISCARD_TO_COLUMN:
+			other_moves.append(move)
+	for choices in (ace_moves, revealing_moves, other_moves):
+		if choices:
+			return rng.choice(choices)
+	return Move(DRAW) if Move(DRAW) in moves else None
+
+
+POLICIES = {
+	"random": random_policy,
+	"greedy": greedy_policy
+}
+
+
+def load_policy(name):
+	# a policy is either a name from POLICIES or a "module:function" path
+	if name in POLICIES:
+		return POLICIES[name]
+	module_name, _, function_name = name.partition(":")
+	return getattr(import_module(module_name), function_name)
+
+
+# --- playing ---
+
+def play_game(seed, policy, max_moves=1000, max_idle_passes=2, draw_count=1):
+	# plays one deal until it is won, the policy gives up, or the stock has
+	# been cycled max_idle_passes times without any other move
+	game_handler = GameHandler(seed, draw_count)
+	rng = Random(seed)
+	num_moves = 0
+	stock_passes = 0
+	idle_passes = 0
+	while num_moves < max_moves and not game_handler.is_won():
+		if game_handler.can_auto_finish():
+			# the rest of the game can't be lost, so it isn't played out
+			return GameResult(seed, True,
+							  num_moves + len(game_handler.finishing_moves()),
+							  stock_passes)
+		move = policy(game_handler, game_handler.legal_moves(), rng)
+		if move is None:
+			break
+		if move.kind == DRAW and game_handler.cursor == len(game_handler.stock):
+			stock_passes += 1
+			idle_passes += 1
+			if idle_passes > max_idle_passes:
+				break
+		elif move.kind != DRAW:
+			idle_passes = 0
+		game_handler.apply(move)
+		num_moves += 1
+	return GameResult(seed, game_handler.is_won(), num_moves, stock_passes)
+
+
+class SimulationStats:
+	# running totals, so results never need to be kept around
+	def __init__(self):
+		self.games = 0
+		self.wins = 0
+		self.moves = 0
+		self.stock_passes = 0
+
+	def add(self, result):
+		self.games += 1
+		self.wins += result.won
+		self.moves += result.moves
+		self.stock_passes += result.stock_passes
+
+	def merge(self, other):
+		self.games += other.games
+		self.wins += other.wins
+		self.moves += other.moves
+		self.stock_passes += other.stock_passes
+
+	@property
+	def win_rate(self):
+		return self.wins / self.games if self.games else 0.0
+
+	def as_dict(self):
+		games = self.games or 1
+		return {
+			"games": self.games,
+			"wins": self.wins,
+			"win_rate": self.win_rate,
+			"average_moves": self.moves / games,
+			"average_stock_passes": self.stock_passes / games
+		}
+
+
+def play_chunk(policy_name, start, count, max_moves, draw_count=1):
+	policy = load_policy(policy_name)
+	stats = SimulationStats()
+	for seed in range(start, start + count):
+		stats.add(play_game(seed, policy, max_moves, draw_count=draw_count))
+	return stats
+
+
+def run_simulation(policy_name, start, count, workers=1, chunk_size=256,
+				   max_moves=1000, on_progress=None, draw_count=1):
+	# plays deals start..start + count - 1. chunks are handed out to the
+	# pool a few at a time and merged as they finish
+	stats = SimulationStats()
+	chunks = ((chunk_start, min(chunk_size, start + count - chunk_start))
+			  for chunk_start in range(start, start + count, chunk_size))
+	if workers <= 1:
+		for chunk_start, chunk_count in chunks:
+			stats.merge(play_chunk(policy_name, chunk_start, chunk_count,
+								   max_moves, draw_count))
+			if on_progress:
+				on_progress(stats)
+		return stats
+
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		pending = set()
+		for chunk_start, chunk_count in chunks:
+			pending.add(executor.submit(play_chunk, policy_name, chunk_start,
+										chunk_count, max_moves, draw_count))
+			if len(pending) >= workers * 2:
+				pending = _merge_finished(pending, stats, on_progress)
+		while pending:
+			pending = _merge_finished(pending, stats, on_progress)
+	return stats
+
+
+def _merge_finished(pending, stats, on_progress):
+	done, pending = wait(pending, return_when=FIRST_COMPLETED)
+	for future in done:
+		stats.merge(future.result())
+		if on_progress:
+			on_progress(stats)
+	return pending
\ No newline at end of file
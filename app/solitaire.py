@@ -1,25 +1,51 @@
-from curses import KEY_RESIZE, KEY_UP, KEY_DOWN
+import curses
+from curses import KEY_RESIZE, KEY_UP, KEY_DOWN, KEY_NPAGE, KEY_PPAGE
 from functools import partial
+from time import monotonic
+from .dealpool import *
+from .hints import *
+from .stats import *
 from .uihandler import *
 
 
 class Solitaire:
-	def __init__(self, screen):
+	# seconds to wait for a winnable deal before dealing a random one
+	DEAL_TIMEOUT = 10
+
+	def __init__(self, screen, draw_count=1, tracer=None, term=curses,
+				 recorder=None, stats=None, deal_pool=None):
+		# tracer is an optional KeyTracer timing every keypress, recorder an
+		# optional ReplayWriter logging every game, stats an optional
+		# StatsStore that finished games are added to and deal_pool an
+		# optional DealPool, which limits play to winnable deals
 		self.screen = screen
-		self.game_handler = GameHandler()
-		self.game_ui_handler = GameUiHandler(self.screen, self.game_handler)
+		self.tracer = tracer
+		self.stats = stats
+		self.deal_pool = deal_pool
+		self.hint_engine = HintEngine()
+		self._start_game()
+		self.game_handler = GameHandler(self._next_deal(), draw_count,
+										recorder=recorder)
+		self.game_ui_handler = GameUiHandler(self.screen, self.game_handler,
+											 term=term)
 		self._initialize_key_mapping()
 		self.play()
 
 	def play(self):
 		self.playing = True
 		while self.playing:
-			x = self.screen.getch()
+			x = self._read_key()
+			# a hint is only shown until the next key
+			self.game_ui_handler.clear_selection()
 			if x in self.KEY_MAPPING:
 				self.KEY_MAPPING[x]()
+			if self.game_handler.should_auto_finish():
+				self.game_ui_handler.auto_finish()
+			if self.game_handler.is_won():
+				self._record_game()
 
 	def select_discard(self):
-		if self.game_handler.discard:
+		if self.game_handler.discard_top() is not None:
 			self.game_ui_handler.select_discard()
 
 			destinations = {
@@ -33,11 +59,11 @@ class Solitaire:
 				ord("6"): partial(self.game_ui_handler.discard_to_column, 6)
 			}
 
-			dest = self.screen.getch()
+			dest = self._read_key()
 			if dest in destinations:
 				destinations[dest]()
 			else:
-				self.game_ui_handler.populate_discard()
+				self.game_ui_handler.clear_selection()
 
 	def select_column(self, column_index, num_cards=1):
 		column = self.game_handler.columns[column_index]
@@ -68,21 +94,93 @@ class Solitaire:
 								  column_index)
 			}
 
-			dest = self.screen.getch()
+			dest = self._read_key()
 			if dest in destinations:
 				destinations[dest]()
 			else:
-				self.game_ui_handler.populate_column(column_index)
+				self.game_ui_handler.clear_selection()
 		else:
-			self.game_ui_handler.populate_column(column_index)
+			self.game_ui_handler.clear_selection()
+
+	def _read_key(self):
+		# keys already typed ahead, from a held key or a paste, are handled
+		# before anything is drawn. everything changed since the last frame
+		# is drawn in a single update once no key is waiting
+		tracer = self.tracer
+		key = self._pending_key()
+		if key != -1:
+			if tracer is not None:
+				now = tracer.clock()
+				tracer.end(now, now, now)
+				tracer.begin(key)
+			return key
+		if tracer is None:
+			self.game_ui_handler.render()
+			return self.screen.getch()
+		logic_end = tracer.clock()
+		self.game_ui_handler.paint()
+		render_end = tracer.clock()
+		self.game_ui_handler.flush()
+		tracer.end(logic_end, render_end, tracer.clock())
+		key = self.screen.getch()
+		tracer.begin(key)
+		return key
+
+	def _pending_key(self):
+		# -1 when no key is waiting
+		self.screen.nodelay(True)
+		key = self.screen.getch()
+		self.screen.nodelay(False)
+		return key
+
+	def show_hint(self):
+		move = self.hint_engine.hint(self.game_handler)
+		if move is not None:
+			self.game_ui_handler.show_hint(move)
 
 	def confirm_quit(self):
+		self._record_game()
 		self.playing = False
 
 	def confirm_new_game(self):
-		self.game_handler.new_game()
+		self._record_game()
+		self.game_handler.new_game(self._next_deal())
+		self._start_game()
 		self.game_ui_handler.draw_screen()
 
+	def _next_deal(self):
+		# None deals a random game, which is also what is dealt if the pool
+		# can't prove a deal winnable within DEAL_TIMEOUT seconds
+		if self.deal_pool is None:
+			return None
+		deal_id = self.deal_pool.take(timeout=0)
+		if deal_id is None:
+			self._show_message("finding a winnable deal...")
+			deal_id = self.deal_pool.take(timeout=self.DEAL_TIMEOUT)
+		return deal_id
+
+	def _show_message(self, msg):
+		# drawn straight to the screen, which the next full draw replaces
+		height, width = self.screen.getmaxyx()
+		msg = msg[:max(width - 1, 0)]
+		self.screen.erase()
+		self.screen.addstr(height // 2, max((width - len(msg)) // 2, 0), msg)
+		self.screen.refresh()
+
+	def _start_game(self):
+		self._game_started = monotonic()
+		self._game_recorded = False
+
+	def _record_game(self):
+		# each game is recorded once, when it is won or when it is left
+		# after at least one move
+		if (self.stats is None or self._game_recorded or
+				not self.game_handler.can_undo()):
+			return
+		self._game_recorded = True
+		self.stats.add(game_record(self.game_handler,
+								   monotonic() - self._game_started))
+
 	def _initialize_key_mapping(self):
 		self.KEY_MAPPING = {
 			KEY_RESIZE: self.game_ui_handler.calibrate_screen,
@@ -96,5 +194,10 @@ class Solitaire:
 			ord("4"): partial(self.select_column, 4),
 			ord("5"): partial(self.select_column, 5),
 			ord("6"): partial(self.select_column, 6),
-			ord("n"): self.confirm_new_game
+			ord("n"): self.confirm_new_game,
+			ord("h"): self.show_hint,
+			ord("u"): self.game_ui_handler.undo,
+			ord("r"): self.game_ui_handler.redo,
+			KEY_PPAGE: partial(self.game_ui_handler.scroll_page, -1),
+			KEY_NPAGE: partial(self.game_ui_handler.scroll_page, 1)
 		}
\ No newline at end of file
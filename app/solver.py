@@ -0,0 +1,332 @@
+from collections import OrderedDict
+from .gamehandler import *
+
+
+ACE_PILE_MOVES = (DISCARD_TO_ACE_PILE, COLUMN_TO_ACE_PILE)
+DRAW_MOVE = Move(DRAW)
+DISCARD_TO_ACE_PILE_MOVE = Move(DISCARD_TO_ACE_PILE)
+
+# COLUMN_FITS[top] holds the ordinals of the cards that can go on a column
+# topped by top, or on an empty column when top is EMPTY_PILE
+COLUMN_FITS = tuple(tuple(card.ordinal for card in CARDS
+						  if CAN_STACK_ON_COLUMN[card.ordinal][top])
+					for top in range(EMPTY_PILE + 1))
+
+
+class Solver:
+	# depth-first search over the steps of search_steps, with a bounded
+	# transposition table of states already explored. node and cache
+	# counters are kept across calls for tuning
+	def __init__(self, max_nodes=100000, max_table_entries=500000):
+		self.max_nodes = max_nodes
+		self.max_table_entries = max_table_entries
+		self.nodes_expanded = 0
+		self.cache_hits = 0
+		self.cache_evictions = 0
+		self._table = OrderedDict()
+
+	def is_winnable(self, game_handler):
+		# returns None when the search ran out of nodes
+		try:
+			return self.solve(game_handler) is not None
+		except SearchLimitError:
+			return None
+
+	def solve(self, game_handler):
+		# returns the winning moves, or None when the game can't be won
+		self._table.clear()
+		self._node_limit = self.nodes_expanded + self.max_nodes
+		return self._search(game_handler)
+
+	def reset_counters(self):
+		self.nodes_expanded = 0
+		self.cache_hits = 0
+		self.cache_evictions = 0
+
+	def _search(self, game_handler):
+		# iterative depth-first search using make/unmake on one copy of the
+		# game. each stack entry holds the remaining steps of a position on
+		# the current path, and path holds the steps applied to reach it,
+		# with the stock cursor from before each
+		game_handler = game_handler.copy()
+		stack = []
+		path = []
+		entered = True
+		while True:
+			if entered:
+				finish = finishing_moves(game_handler)
+				if finish is not None:
+					return [move for step, _ in path for move in step_moves(step)] + finish
+				if self._visit(game_handler):
+					stack.append(iter(search_steps(game_handler)))
+				else:
+					_undo_step(game_handler, *path.pop())
+			if not stack:
+				return None
+			step = next(stack[-1], None)
+			if step is None:
+				stack.pop()
+				if path:
+					_undo_step(game_handler, *path.pop())
+				entered = False
+			else:
+				path.append((step, _apply_step(game_handler, step)))
+				entered = True
+
+	def _visit(self, game_handler):
+		# records the position, returning False if it was already explored
+		key = state_key(game_handler)
+		if key in self._table:
+			self.cache_hits += 1
+			return False
+		self._table[key] = True
+		if len(self._table) > self.max_table_entries:
+			self._table.popitem(last=False)
+			self.cache_evictions += 1
+		self.nodes_expanded += 1
+		if self.nodes_expanded > self._node_limit:
+			raise SearchLimitError
+		return True
+
+
+def state_key(game_handler):
+	# the position hash, with the stock cursor left out when drawing one
+	# card at a time as every stock card can be reached from any cursor
+	# then. columns are put in a canonical order, which makes kings moved
+	# to empty columns in either order the same position. only a king can
+	# start an empty column, so the columns with a king at the bottom are
+	# ordered by that king over the slots they hold. empty columns add
+	# nothing to the hash wherever they are
+	key = game_handler.position_hash()
+	if game_handler.draw_count == 1:
+		key ^= ZOBRIST_CURSOR_KEYS[game_handler.cursor]
+	columns = game_handler.columns
+	king_columns = [(i, column[0].ordinal) for i, column in enumerate(columns)
+					if column and column[0].face_up and column[0].value == 13]
+	if len(king_columns) > 1:
+		slots = [i for i, _ in king_columns]
+		order = sorted(king_columns, key=lambda king_column: king_column[1])
+		for slot, (i, _) in zip(slots, order):
+			if slot != i:
+				key ^= zobrist_relocate(columns[i], COLUMN_LOCATION + i,
+										COLUMN_LOCATION + slot)
+	return key
+
+
+def search_steps(game_handler):
+	# the steps the solver tries, ordered and pruned as in ordered_moves. a
+	# step is a move, the number of draws before it and the stock cursor
+	# they leave. instead of single draws, every card the stock can bring to
+	# the top of the discard is played straight to where it fits, the
+	# draws leading up to it being part of the step. only the cards, not
+	# the cursor, matter when drawing one at a time, so a stock card needs
+	# no draws to be safe to play up then. column moves are looked up by the
+	# card they need rather than found with legal_moves, as the search
+	# undoes too much for its index to help
+	columns = game_handler.columns
+	ace_pile_tops = {suit: ace_pile[-1].ordinal if ace_pile else EMPTY_PILE
+					 for suit, ace_pile in game_handler.ace_piles.items()}
+	# card ordinal -> columns it can go on
+	dests = {}
+	empty_columns = []
+	for dest, column in enumerate(columns):
+		if column:
+			for ordinal in COLUMN_FITS[column[-1].ordinal]:
+				dests.setdefault(ordinal, []).append(dest)
+		else:
+			empty_columns.append(dest)
+	if empty_columns:
+		# all empty columns are equivalent, so only the first is tried
+		for ordinal in COLUMN_FITS[EMPTY_PILE]:
+			dests.setdefault(ordinal, []).append(empty_columns[0])
+	stock_cards = reachable_stock_cards(game_handler)
+	stock_ordinals = {card.ordinal for _, _, card in stock_cards}
+	ace_steps = []
+	revealing_steps = []
+	other_steps = []
+	stock_steps = []
+	for source, column in enumerate(columns):
+		if not column:
+			continue
+		card = column[-1]
+		if CAN_STACK_ON_ACE_PILE[card.ordinal][ace_pile_tops[card.suit]]:
+			step = (Move(COLUMN_TO_ACE_PILE, source), 0, None)
+			if _is_safe_ace_card(game_handler, card):
+				return [step]
+			ace_steps.append(step)
+		for index in range(len(column) - 1, -1, -1):
+			card = column[index]
+			if not card.face_up:
+				break
+			for dest in dests.get(card.ordinal, ()):
+				if dest == source or not (index or columns[dest]):
+					# moving a whole column into an empty one does nothing
+					continue
+				step = (Move(COLUMN_TO_COLUMN, source, dest, len(column) - index), 0, None)
+				if not index or not column[index - 1].face_up:
+					revealing_steps.append(step)
+				elif _is_useful_exposure(game_handler, column[index - 1], stock_ordinals):
+					other_steps.append(step)
+	for num_draws, cursor, card in stock_cards:
+		fits_ace_pile = CAN_STACK_ON_ACE_PILE[card.ordinal][ace_pile_tops[card.suit]]
+		card_dests = dests.get(card.ordinal, ())
+		if not (fits_ace_pile or card_dests):
+			continue
+		if fits_ace_pile:
+			step = (DISCARD_TO_ACE_PILE_MOVE, num_draws, cursor)
+			if ((not num_draws or game_handler.draw_count == 1) and
+					_is_safe_ace_card(game_handler, card)):
+				return [step]
+			ace_steps.append(step)
+		for dest in card_dests:
+			stock_steps.append((Move(DISCARD_TO_COLUMN, dest=dest), num_draws, cursor))
+	return ace_steps + revealing_steps + other_steps + stock_steps
+
+
+def reachable_stock_cards(game_handler):
+	# (draws, cursor, card) for every card that can be brought to the top of
+	# the discard by drawing, fewest draws first
+	stock = game_handler.stock
+	num_cards = len(stock)
+	draw_count = game_handler.draw_count
+	cursor = game_handler.cursor
+	seen = set()
+	num_draws = 0
+	cards = []
+	while cursor not in seen:
+		seen.add(cursor)
+		if cursor:
+			cards.append((num_draws, cursor, stock[cursor - 1].flip()))
+		cursor = min((0 if cursor == num_cards else cursor) + draw_count, num_cards)
+		num_draws += 1
+	return cards
+
+
+def ordered_moves(game_handler):
+	# ace pile moves first, then moves that reveal cards, then everything
+	# else, with draws last. column moves that can't make progress are pruned
+	ace_moves = []
+	revealing_moves = []
+	other_moves = []
+	draws = []
+	empty_dest = None
+	discard_card = game_handler.discard_top()
+	discard_ordinals = {discard_card.ordinal} if discard_card is not None else set()
+	for move in game_handler.legal_moves():
+		if move.kind in ACE_PILE_MOVES:
+			if _is_safe_ace_pile_move(game_handler, move):
+				return [move]
+			ace_moves.append(move)
+		elif move.kind == DRAW:
+			draws.append(move)
+		elif move.kind == DISCARD_TO_COLUMN:
+			if not game_handler.columns[move.dest]:
+				# all empty columns are equivalent
+				if empty_dest not in (None, move.dest):
+					continue
+				empty_dest = move.dest
+			other_moves.append(move)
+		else:
+			column = game_handler.columns[move.source]
+			dest_column = game_handler.columns[move.dest]
+			if not dest_column:
+				if empty_dest not in (None, move.dest):
+					continue
+				empty_dest = move.dest
+			remaining = column[:-move.num_cards]
+			if not remaining:
+				# moving a whole column into an empty one does nothing
+				if dest_column:
+					revealing_moves.append(move)
+			elif not remaining[-1].face_up:
+				revealing_moves.append(move)
+			elif _is_useful_exposure(game_handler, remaining[-1], discard_ordinals):
+				other_moves.append(move)
+	return ace_moves + revealing_moves + other_moves + draws
+
+
+def finishing_moves(game_handler):
+	# moves every card to the ace piles once no card in the columns is face
+	# down. returns None while cards are still hidden or if the stock can't
+	# be played through. drawing several cards at a time with a stock left
+	# isn't a sure win, so that case is played out greedily
+	if game_handler.face_down_count:
+		return None
+	moves = game_handler.finishing_moves()
+	if moves is not None:
+		return moves
+	game_handler = game_handler.copy()
+	moves = []
+	draws_without_progress = 0
+	while draws_without_progress <= len(game_handler.stock):
+		ace_moves = [move for move in game_handler.legal_moves()
+					 if move.kind in ACE_PILE_MOVES]
+		if ace_moves:
+			move = ace_moves[0]
+			draws_without_progress = 0
+		elif game_handler.stock:
+			move = Move(DRAW)
+			draws_without_progress += 1
+		else:
+			return moves
+		game_handler.apply(move)
+		moves.append(move)
+	return None
+
+
+def _ace_pile_card(game_handler, move):
+	if move.kind == DISCARD_TO_ACE_PILE:
+		return game_handler.discard_top()
+	return game_handler.columns[move.source][-1]
+
+
+def _is_safe_ace_pile_move(game_handler, move):
+	return _is_safe_ace_card(game_handler, _ace_pile_card(game_handler, move))
+
+
+def _is_safe_ace_card(game_handler, card):
+	# a card can always go up once both ace piles of the other color are
+	# high enough that nothing could need to be placed on it
+	if card.value <= 2:
+		return True
+	for suit, ace_pile in game_handler.ace_piles.items():
+		if Card.SUITS[suit]["is_red"] != card.is_red and len(ace_pile) < card.value - 1:
+			return False
+	return True
+
+
+def step_moves(step):
+	move, num_draws, _ = step
+	return [DRAW_MOVE] * num_draws + [move]
+
+
+def _apply_step(game_handler, step):
+	# draws only move the stock cursor, so it is turned straight to where
+	# they would leave it rather than drawing card by card. returns the
+	# cursor to undo to
+	move, num_draws, cursor = step
+	old_cursor = game_handler.cursor
+	if num_draws:
+		game_handler._set_cursor(cursor)
+	game_handler.apply(move)
+	return old_cursor
+
+
+def _undo_step(game_handler, step, old_cursor):
+	game_handler.undo()
+	if step[1]:
+		game_handler._set_cursor(old_cursor)
+		game_handler._touch(game_handler.DISCARD)
+
+
+def _is_useful_exposure(game_handler, card, stock_ordinals):
+	# splitting a run only helps if the exposed card has somewhere to go or
+	# one of stock_ordinals, the stock cards in play, can be placed on it
+	ace_pile = game_handler.ace_piles[card.suit]
+	if game_handler._can_add_to_ace_pile(card, ace_pile):
+		return True
+	return not stock_ordinals.isdisjoint(COLUMN_FITS[card.ordinal])
+
+
+class SearchLimitError(Exception):
+	pass
\ No newline at end of file
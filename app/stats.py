@@ -0,0 +1,194 @@
+import json
+import os
+from collections import namedtuple
+from time import time
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+
+# one line of json per finished game, in the order they finished
+GameRecord = namedtuple("GameRecord", ["finished", "seed", "draw_count", "won",
+									   "moves", "seconds", "score"])
+
+SUMMARY_VERSION = 1
+SCORE_BUCKET = 100
+
+
+def default_stats_path():
+	return os.environ.get("SOLITAIRE_STATS",
+						  os.path.join(os.path.expanduser("~"), ".solitaire", "stats.jsonl"))
+
+
+def game_record(game_handler, seconds):
+	return GameRecord(time(), game_handler.seed, game_handler.draw_count,
+					  game_handler.is_won(), len(game_handler.history()),
+					  seconds, game_handler.score())
+
+
+class StatsSummary:
+	# running aggregates over every record folded in so far. offset is how
+	# far into the log they reach
+	def __init__(self):
+		self.offset = 0
+		self.games = 0
+		self.wins = 0
+		self.current_streak = 0
+		self.best_streak = 0
+		self.best_seconds = None
+		self.best_score = 0
+		self.total_moves = 0
+		self.total_seconds = 0.0
+		# number of games per score bucket, keyed by the bucket's lowest score
+		self.scores = {}
+
+	def add(self, record):
+		self.games += 1
+		self.total_moves += record.moves
+		self.total_seconds += record.seconds
+		self.best_score = max(self.best_score, record.score)
+		bucket = record.score // SCORE_BUCKET * SCORE_BUCKET
+		self.scores[bucket] = self.scores.get(bucket, 0) + 1
+		if record.won:
+			self.wins += 1
+			self.current_streak += 1
+			self.best_streak = max(self.best_streak, self.current_streak)
+			if self.best_seconds is None or record.seconds < self.best_seconds:
+				self.best_seconds = record.seconds
+		else:
+			self.current_streak = 0
+
+	@property
+	def win_rate(self):
+		return self.wins / self.games if self.games else 0.0
+
+	def as_dict(self):
+		return {
+			"version": SUMMARY_VERSION,
+			"offset": self.offset,
+			"games": self.games,
+			"wins": self.wins,
+			"win_rate": self.win_rate,
+			"current_streak": self.current_streak,
+			"best_streak": self.best_streak,
+			"best_seconds": self.best_seconds,
+			"best_score": self.best_score,
+			"total_moves": self.total_moves,
+			"total_seconds": self.total_seconds,
+			"scores": {str(bucket): count for bucket, count in sorted(self.scores.items())}
+		}
+
+	@classmethod
+	def from_dict(cls, data):
+		summary = cls()
+		if data.get("version") != SUMMARY_VERSION:
+			return summary
+		for name in ("offset", "games", "wins", "current_streak", "best_streak",
+					 "best_seconds", "best_score", "total_moves", "total_seconds"):
+			setattr(summary, name, data[name])
+		summary.scores = {int(bucket): count for bucket, count in data["scores"].items()}
+		return summary
+
+
+class StatsStore:
+	# finished games are appended to path, and the aggregates are kept in a
+	# summary file next to it, so reading the stats never rescans the log.
+	# writers take an exclusive lock on a third file, which outlives
+	# compaction replacing the log. the summary is replaced atomically, so
+	# readers don't need the lock
+	def __init__(self, path):
+		self.path = path
+		self.summary_path = path + ".summary"
+		self.lock_path = path + ".lock"
+
+	def add(self, record):
+		with self._locked():
+			summary = self._read_summary()
+			line = json.dumps(record._asdict()) + "\n"
+			with open(self.path, "a") as f:
+				f.write(line)
+				summary.offset = f.tell()
+			summary.add(record)
+			self._write_summary(summary)
+
+	def summary(self):
+		# the saved aggregates, plus any games a writer appended without
+		# getting to update them
+		return self._read_summary()
+
+	def recent(self, count=10):
+		records = self._read_records(0)[0]
+		return records[-count:] if count else []
+
+	def compact(self, keep=100):
+		# drops all but the last keep records from the log. the aggregates
+		# already include them, so only the game history shown is lost
+		with self._locked():
+			summary = self._read_summary()
+			records = self._read_records(0)[0]
+			kept = records[-keep:] if keep else []
+			temp_path = self.path + ".tmp"
+			with open(temp_path, "w") as f:
+				for record in kept:
+					f.write(json.dumps(record._asdict()) + "\n")
+				summary.offset = f.tell()
+			os.replace(temp_path, self.path)
+			self._write_summary(summary)
+			return len(records) - len(kept)
+
+	def _read_summary(self):
+		try:
+			with open(self.summary_path) as f:
+				summary = StatsSummary.from_dict(json.load(f))
+		except (OSError, ValueError, KeyError):
+			summary = StatsSummary()
+		records, offset = self._read_records(summary.offset)
+		for record in records:
+			summary.add(record)
+		summary.offset = offset
+		return summary
+
+	def _read_records(self, offset):
+		# complete records from offset on, and the offset after the last.
+		# a line still being written is left for later
+		try:
+			with open(self.path, "rb") as f:
+				f.seek(offset)
+				data = f.read()
+		except OSError:
+			return [], 0
+		end = data.rfind(b"\n") + 1
+		records = [GameRecord(**json.loads(line))
+				   for line in data[:end].splitlines() if line]
+		return records, offset + end
+
+	def _write_summary(self, summary):
+		temp_path = self.summary_path + ".tmp"
+		with open(temp_path, "w") as f:
+			json.dump(summary.as_dict(), f)
+		os.replace(temp_path, self.summary_path)
+
+	def _locked(self):
+		return _FileLock(self.lock_path)
+
+
+class _FileLock:
+	# exclusive lock for the duration of a with block. without fcntl there
+	# is no locking, and concurrent writers are up to luck
+	def __init__(self, path):
+		self.path = path
+
+	def __enter__(self):
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		self._file = open(self.path, "a")
+		if fcntl is not None:
+			fcntl.flock(self._file, fcntl.LOCK_EX)
+		return self
+
+	def __exit__(self, *exc_info):
+		if fcntl is not None:
+			fcntl.flock(self._file, fcntl.LOCK_UN)
+		self._file.close()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import curses
+import json
+from collections import deque
+from time import perf_counter_ns
+
+
+# curses key codes by value, for naming keys in traces
+KEY_NAMES = {getattr(curses, name): name for name in dir(curses)
+			 if name.startswith("KEY_")}
+
+PHASES = ("logic", "render", "flush")
+
+
+class KeyTracer:
+	# times every keypress from getch returning to the next frame reaching
+	# the terminal, split into the handler's game logic, painting the dirty
+	# regions and flushing them. events are (key, start, logic_end,
+	# render_end, flush_end) in clock nanoseconds, and only the last
+	# capacity events are kept
+	def __init__(self, capacity=4096, clock=perf_counter_ns):
+		self.events = deque(maxlen=capacity)
+		self.clock = clock
+		self._key = None
+		self._start = None
+
+	def begin(self, key):
+		self._key = key
+		self._start = self.clock()
+
+	def end(self, logic_end, render_end, flush_end):
+		# the first frame is painted before any key is read
+		if self._start is not None:
+			self.events.append((self._key, self._start, logic_end,
+								render_end, flush_end))
+			self._start = None
+
+	def as_dict(self):
+		events = [{
+			"key": key_name(key),
+			"start_us": start / 1000,
+			"logic_us": (logic_end - start) / 1000,
+			"render_us": (render_end - logic_end) / 1000,
+			"flush_us": (flush_end - render_end) / 1000,
+			"total_us": (flush_end - start) / 1000
+		} for key, start, logic_end, render_end, flush_end in self.events]
+		summary = {}
+		for phase in PHASES + ("total",):
+			durations = sorted(event[phase + "_us"] for event in events)
+			summary[phase] = {
+				"p50_us": _percentile(durations, 0.5),
+				"p95_us": _percentile(durations, 0.95),
+				"max_us": durations[-1] if durations else 0
+			}
+		return {"events": events, "summary": summary}
+
+	def as_chrome_trace(self):
+		# one slice per key with its phases nested inside, for
+		# chrome://tracing or perfetto
+		trace_events = []
+		for key, *times in self.events:
+			name = key_name(key)
+			trace_events.append(_slice(name, times[0], times[-1], {"key": name}))
+			for phase, start, end in zip(PHASES, times, times[1:]):
+				trace_events.append(_slice(phase, start, end, {"key": name}))
+		return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+	def save(self, path, trace_format="chrome"):
+		data = self.as_chrome_trace() if trace_format == "chrome" else self.as_dict()
+		with open(path, "w") as f:
+			json.dump(data, f)
+
+
+def key_name(key):
+	if key in KEY_NAMES:
+		return KEY_NAMES[key]
+	if 32 <= key < 127:
+		return chr(key)
+	return str(key)
+
+
+def _slice(name, start, end, args):
+	return {"name": name, "ph": "X", "pid": 1, "tid": 1,
+			"ts": start / 1000, "dur": (end - start) / 1000, "args": args}
+
+
+def _percentile(durations, fraction):
+	if not durations:
+		return 0
+	return durations[min(len(durations) - 1, int(len(durations) * fraction))]
\ No newline at end of file
@@ -1,5 +1,6 @@
-from curses import color_pair
+import curses
 from .gamehandler import *
+from .rendercache import *
 
 
 class GameUiHandler:
@@ -7,58 +8,128 @@ class GameUiHandler:
 	PADDING = 1
 	SPACING = 2
 
-	def __init__(self, screen, game_handler):
+	def __init__(self, screen, game_handler, render_cache=RENDER_CACHE,
+				 term=curses):
+		# term provides color_pair, doupdate and newpad, so a fake terminal
+		# can stand in for curses
 		self.screen = screen
 		self.game_handler = game_handler
+		self.render_cache = render_cache
+		self.term = term
 		self._screens_initialized = False
+		self._too_small = False
+		# regions to repaint on the next render: "deck", "discard", suit
+		# names for the ace piles and indices for the columns
+		self._dirty = set()
+		# first tableau row shown in the column viewport
+		self.scroll_y = 0
+		# the highlighted region, "deck", "discard" or a column index, and
+		# how many of its cards are highlighted. drawn on the next render
+		# like any other change
+		self.selected = None
+		self.num_selected = 0
 		self._min_height = self._min_height()
 		self._min_width = self._min_width()
-		self._fg = color_pair(1)
-		self._red_fg = color_pair(2)
-		self._select_fg = color_pair(3)
+		self._fg = term.color_pair(1)
+		self._red_fg = term.color_pair(2)
+		self._select_fg = term.color_pair(3)
+		self._styles = {
+			PLAIN: 0,
+			FG: self._fg,
+			RED: self._red_fg,
+			SELECT: self._select_fg
+		}
 		self.calibrate_screen()
 
 	def calibrate_screen(self):
 		self.height, self.width = self.screen.getmaxyx()
-		if self.height < self._min_height or self.width < self._min_width:
+		self._too_small = (self.height < self._min_height or
+						   self.width < self._min_width)
+		if self._too_small:
 			self.please_make_terminal_bigger()
 		elif not self._screens_initialized:
 			self._initialize_screens()
 		else:
+			self.scroll(0)
 			self.draw_screen()
 
 	def draw_screen(self):
-		self.screen.clear()
-		self.populate_ace_piles()
-		self.populate_deck()
-		self.populate_discard()
-		self.populate_columns()
-		self.screen.refresh()
+		self.screen.erase()
+		self.screen.noutrefresh()
+		self.mark_dirty("deck", "discard", *Card.SUITS)
+		self.mark_dirty(*range(self.COLUMNS))
+		self.render()
+
+	def mark_dirty(self, *regions):
+		self._dirty.update(regions)
+
+	def render(self):
+		# repaints only the regions marked dirty since the last render, then
+		# flushes everything to the terminal in one update
+		self.paint()
+		self.flush()
+
+	def paint(self):
+		if self._screens_initialized and not self._too_small:
+			for region in self._dirty:
+				if region == "deck":
+					self.populate_deck()
+				elif region == "discard":
+					self.populate_discard()
+				elif region in Card.SUITS:
+					self.populate_ace_pile(region)
+				else:
+					self.populate_column(region)
+			self._dirty.clear()
+
+	def flush(self):
+		self.term.doupdate()
+
+	def scroll(self, rows):
+		# moves the column viewport, copying the already painted columns
+		if not self._screens_initialized or self._too_small:
+			return
+		max_scroll = max(0, self._max_column_height() - self._viewport_height())
+		scroll_y = min(max(self.scroll_y + rows, 0), max_scroll)
+		if scroll_y != self.scroll_y:
+			self.scroll_y = scroll_y
+			for idx in range(self.COLUMNS):
+				self._refresh_column(idx)
+
+	def scroll_page(self, direction):
+		self.scroll(direction * max(1, self._viewport_height() // 2))
 
 	def draw(self):
-		self.game_handler.draw()
-		self.populate_deck()
-		self.populate_discard()
+		try:
+			self.game_handler.draw()
+			self.mark_dirty("deck", "discard")
+		except IllegalMoveError:
+			# every stock card has been played
+			pass
 
 	def populate_deck(self):
-		self.deck.clear()
-		deck = self.game_handler.deck
-		if not deck:
+		self.deck.erase()
+		if self.game_handler.cursor == len(self.game_handler.stock):
 			self._draw_empty(self.deck)
 		else:
+			attr = self._select_fg if self.selected == "deck" else 0
+			self.deck.attron(attr)
 			self.deck.box()
+			self.deck.attroff(attr)
 			for i in range(Card.HEIGHT - 2):
 				self.deck.addstr(i + 1, 1, ("/" * (Card.WIDTH - 2)))
-		self.deck.refresh()
+		self.deck.noutrefresh()
 
 	def populate_discard(self):
-		self.discard.clear()
-		discard = self.game_handler.discard
-		if not discard:
+		self.discard.erase()
+		discard_card = self.game_handler.discard_top()
+		if discard_card is None:
 			self._draw_empty(self.discard)
+		elif self.selected == "discard":
+			self._draw_flat_card(self.discard, discard_card, self._select_fg)
 		else:
-			self._draw_flat_card(self.discard, discard[-1])
-		self.discard.refresh()
+			self._draw_flat_card(self.discard, discard_card)
+		self.discard.noutrefresh()
 
 	def populate_ace_piles(self):
 		for suit in Card.SUITS:
@@ -66,13 +137,13 @@ class GameUiHandler:
 
 	def populate_ace_pile(self, suit):
 		window = self.ace_piles[suit]
-		window.clear()
+		window.erase()
 		ace_pile = self.game_handler.ace_piles[suit]
 		if not ace_pile:
 			self._draw_empty(window)
 		else:
 			self._draw_flat_card(window, ace_pile[-1])
-		window.refresh()
+		window.noutrefresh()
 
 	def populate_columns(self):
 		for idx in range(self.COLUMNS):
@@ -80,118 +151,100 @@ class GameUiHandler:
 
 	def populate_column(self, column_index):
 		window = self.columns[column_index]
-		window.clear()
+		window.erase()
 		column = self.game_handler.columns[column_index]
-		if not column:
-			window.addstr(0, 0, Card.TL_CORNER)
-			window.addstr(0, Card.WIDTH - 1, Card.TR_CORNER)
-			window.addstr(Card.HEIGHT - 1, 0, Card.BL_CORNER)
-			window.addstr(Card.HEIGHT - 1,
-						  Card.WIDTH - 1,
-						  Card.BR_CORNER)
-		else:
-			top_border = (Card.TL_CORNER +
-						  (Card.H_LINE * (Card.WIDTH - 2)) +
-						  Card.TR_CORNER)
-			bottom_border = (Card.BL_CORNER +
-							 (Card.H_LINE * (Card.WIDTH - 2)) +
-							 Card.BR_CORNER)
-			running_y = 0
-			top_card = column[-1]
-			card_bottom_display = top_card.display_value + top_card.suit_symbol
-			bottom_attr = self._red_fg if top_card.is_red else self._fg
-
-			for card in column:
-				window.addstr(running_y, 0, top_border)
-				running_y += 1
-				if card.face_up:
-					self._draw_line_borders(window, running_y)
-					card_top_display = card.suit_symbol + card.display_value
-					attr = self._red_fg if card.is_red else self._fg
-					window.addstr(running_y, 1, card_top_display, attr)
-					running_y += 1
-			for i in range(Card.HEIGHT - 4):
-				self._draw_line_borders(window, running_y)
-				running_y += 1
-			self._draw_line_borders(window, running_y)
-			window.addstr(running_y,
-						  Card.WIDTH - len(card_bottom_display) - 1,
-						  card_bottom_display,
-						  bottom_attr)
-			window.addstr(running_y + 1, 0, bottom_border)
-		window.refresh()
+		num_selected = self.num_selected if self.selected == column_index else 0
+		self._blit(window, self.render_cache.column_rows(column, num_selected))
+		self._refresh_column(column_index)
 
 	def select_discard(self):
-		self.discard.clear()
-		discard = self.game_handler.discard
-		self._draw_flat_card(self.discard, discard[-1], self._select_fg)
-		self.discard.refresh()
+		self._select("discard", 1)
 
 	def select_column(self, column_index, num_cards=1):
-		window = self.columns[column_index]
+		# keep the bottom of the selected column in view
 		column = self.game_handler.columns[column_index]
-		column_height = 0
-		for card in column:
-			if card.face_up:
-				column_height += 2
-			else:
-				column_height += 1
-		column_height += (Card.HEIGHT - 2)
-		top_border = (Card.TL_CORNER +
-					  (Card.H_LINE * (Card.WIDTH - 2)) +
-					  Card.TR_CORNER)
-		bottom_border = (Card.BL_CORNER +
-						 (Card.H_LINE * (Card.WIDTH - 2)) +
-						 Card.BR_CORNER)
-		attr = self._select_fg
-		running_y = column_height - 1
-		# bottom border
-		window.addstr(running_y, 0, bottom_border, attr)
-		running_y -= 1
-		# select bottom card
-		for _ in range(Card.HEIGHT - 2):
-			self._draw_line_borders(window, running_y, attr)
-			running_y -= 1
-		# select additional cards
-		for _ in range(1, num_cards):
-			self._draw_line_borders(window, running_y, attr)
-			self._draw_line_borders(window, running_y - 1, attr)
-			running_y -= 2
-		window.addstr(running_y, 0, top_border, attr)
-		window.refresh()
+		bottom = self._column_height(column) - 1
+		viewport_height = self._viewport_height()
+		if bottom >= self.scroll_y + viewport_height:
+			self.scroll(bottom - viewport_height + 1 - self.scroll_y)
+		self._select(column_index, num_cards)
+
+	def show_hint(self, move):
+		# highlights where the hinted move comes from, as a selection
+		if move.kind == DRAW:
+			self._select("deck", 1)
+		elif move.kind in (DISCARD_TO_ACE_PILE, DISCARD_TO_COLUMN):
+			self._select("discard", 1)
+		else:
+			self.select_column(move.source, move.num_cards)
+
+	def clear_selection(self):
+		if self.selected is not None:
+			self.mark_dirty(self.selected)
+		self.selected = None
+		self.num_selected = 0
+
+	def auto_finish(self):
+		# plays out a game that can no longer be lost, drawn in one repaint
+		if self.game_handler.auto_finish():
+			self.clear_selection()
+			self.mark_dirty("deck", "discard", *Card.SUITS)
+			self.mark_dirty(*range(self.COLUMNS))
+
+	def undo(self):
+		self.clear_selection()
+		entry = self.game_handler.last_entry()
+		try:
+			self.game_handler.undo()
+			self._mark_entry_dirty(entry)
+		except IllegalMoveError:
+			pass
+
+	def redo(self):
+		self.clear_selection()
+		try:
+			self.game_handler.redo()
+			self._mark_entry_dirty(self.game_handler.last_entry())
+		except IllegalMoveError:
+			pass
 
 	def column_to_column(self, start_index, end_index, num_cards):
+		self.clear_selection()
 		try:
 			self.game_handler.column_to_column(start_index,
 											   end_index,
 											   num_cards)
-			self.populate_columns()
+			self.mark_dirty(start_index, end_index)
 		except IllegalMoveError:
-			self.populate_columns()
+			self.mark_dirty(start_index)
 
 	def column_to_ace_pile(self, column_index):
+		self.clear_selection()
+		column = self.game_handler.columns[column_index]
 		try:
+			suit = column[-1].suit if column else None
 			self.game_handler.column_to_ace_pile(column_index)
-			self.populate_columns()
-			self.populate_ace_piles()
+			self.mark_dirty(column_index, suit)
 		except IllegalMoveError:
-			self.populate_columns()
+			self.mark_dirty(column_index)
 
 	def discard_to_ace_pile(self):
+		self.clear_selection()
+		discard_card = self.game_handler.discard_top()
 		try:
+			suit = discard_card.suit if discard_card else None
 			self.game_handler.discard_to_ace_pile()
-			self.populate_discard()
-			self.populate_ace_piles()
+			self.mark_dirty("discard", suit)
 		except IllegalMoveError:
-			self.populate_discard()
+			self.mark_dirty("discard")
 
 	def discard_to_column(self, column_index):
+		self.clear_selection()
 		try:
 			self.game_handler.discard_to_column(column_index)
-			self.populate_discard()
-			self.populate_column(column_index)
+			self.mark_dirty("discard", column_index)
 		except IllegalMoveError:
-			self.populate_discard()
+			self.mark_dirty("discard")
 
 	def please_make_terminal_bigger(self):
 		msg = "please make your terminal larger :) i am tall!"
@@ -233,21 +286,42 @@ class GameUiHandler:
 										  discard_start_y,
 										  discard_start_x)
 
-		# initialize columns
+		# initialize columns. they are painted in full on an offscreen pad
+		# and only the rows inside the viewport are copied to the screen
+		self.tableau = self.term.newpad(self._max_column_height(), self._tableau_width())
 		self.columns = []
-		max_column_height = self._max_column_height()
-		column_start_y = Card.HEIGHT + self.PADDING + self.SPACING
 		for i in range(self.COLUMNS):
-			start_x = self.PADDING + (i * Card.WIDTH) + (i * self.SPACING)
-			column = self.screen.subwin(max_column_height,
-										Card.WIDTH,
-										column_start_y,
-										start_x)
+			start_x = (i * Card.WIDTH) + (i * self.SPACING)
+			column = self.tableau.subpad(self._max_column_height(),
+										 Card.WIDTH,
+										 0,
+										 start_x)
 			self.columns.append(column)
 
 		self._screens_initialized = True
 		self.draw_screen()
 
+	def _select(self, region, num_cards):
+		self.clear_selection()
+		self.selected = region
+		self.num_selected = num_cards
+		self.mark_dirty(region)
+
+	def _mark_entry_dirty(self, entry):
+		# the regions a journalled move changes, either way round. the entry
+		# names the ace pile a card went to
+		move = entry.move
+		if move.kind == DRAW:
+			self.mark_dirty("deck", "discard")
+		elif move.kind == DISCARD_TO_ACE_PILE:
+			self.mark_dirty("discard", entry.suit)
+		elif move.kind == DISCARD_TO_COLUMN:
+			self.mark_dirty("discard", move.dest)
+		elif move.kind == COLUMN_TO_ACE_PILE:
+			self.mark_dirty(move.source, entry.suit)
+		else:
+			self.mark_dirty(move.source, move.dest)
+
 	def _draw_empty(self, window):
 		window.border(" ", " ", " ", " ", 0, 0, 0, 0)
 
@@ -256,30 +330,48 @@ class GameUiHandler:
 		window.attron(attr)
 		window.box()
 		window.attroff(attr)
-		card_top_display = card.suit_symbol + card.display_value
-		card_bottom_display = card.display_value + card.suit_symbol
-		color = self._red_fg if card.is_red else self._fg
-		window.addstr(1, 1, card_top_display, color)
-		window.addstr(Card.HEIGHT - 2,
-					  Card.WIDTH - len(card_bottom_display) - 1,
-					  card_bottom_display,
-					  color)
-
-	def _draw_line_borders(self, window, y, attr=None):
-		attr = attr if attr else self._fg
-		window.addstr(y, 0, Card.V_LINE, attr)
-		window.addstr(y, Card.WIDTH - 1, Card.V_LINE, attr)
+		self._blit(window, self.render_cache.face_rows(card))
+
+	def _blit(self, window, rows):
+		styles = self._styles
+		for y, x, text, style in rows:
+			window.addstr(y, x, text, styles[style])
+
+	def _refresh_column(self, column_index):
+		window = self.columns[column_index]
+		start_y = self._column_start_y()
+		start_x = self.PADDING + column_index * (Card.WIDTH + self.SPACING)
+		end_y = start_y + min(self._viewport_height(),
+							  self._max_column_height() - self.scroll_y) - 1
+		window.noutrefresh(self.scroll_y, 0,
+						   start_y, start_x,
+						   end_y, start_x + Card.WIDTH - 1)
+
+	def _column_height(self, column):
+		# rows used by a painted column, down to its bottom border
+		height = Card.HEIGHT - 2
+		for card in column:
+			height += 2 if card.face_up else 1
+		return height
+
+	def _column_start_y(self):
+		return Card.HEIGHT + self.PADDING + self.SPACING
+
+	def _viewport_height(self):
+		return self.height - self._column_start_y() - self.PADDING
+
+	def _tableau_width(self):
+		return (Card.WIDTH * self.COLUMNS) + (self.SPACING * (self.COLUMNS - 1))
 
 	def _min_width(self):
-		width = Card.WIDTH * self.COLUMNS
+		width = self._tableau_width()
 		# add padding on either side
 		width += (self.PADDING * 2)
-		# add spacing between columns
-		width += (self.SPACING * (self.COLUMNS - 1))
 		return width
 
 	def _min_height(self):
-		height = self._max_column_height()
+		# a full card of each column has to fit in the viewport
+		height = Card.HEIGHT
 		# top row with ace piles and deck/discard
 		height += Card.HEIGHT
 		# add spacing and padding
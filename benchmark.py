@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+from app.benchmark import *
+
+
+def main():
+	parser = argparse.ArgumentParser(description="time the rules engine and rendering paths")
+	parser.add_argument("names", nargs="*",
+						help="benchmark name prefixes to run, all by default")
+	parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+	parser.add_argument("--repaint", action="store_true",
+						help="print what each ui action writes to the terminal and exit")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--scale", type=float, default=1.0,
+						help="multiplies the number of runs per repeat")
+	parser.add_argument("--output", help="save results as json")
+	parser.add_argument("--compare", help="baseline json to compare against")
+	parser.add_argument("--threshold", type=float, default=0.1,
+						help="slowdown over the baseline counted as a regression")
+	args = parser.parse_args()
+
+	if args.list:
+		for benchmark in BENCHMARKS:
+			print(benchmark.name)
+		return 0
+	if args.repaint:
+		print(json.dumps(measure_repaints(), indent=2))
+		return 0
+
+	def report(result):
+		print("%-32s %10s" % (result.name, format_seconds(result.seconds)))
+
+	results = run_benchmarks(args.names, args.repeat, args.scale, report)
+	if args.output:
+		save_results(results, args.output)
+	if not args.compare:
+		return 0
+
+	print()
+	regressed = False
+	for comparison in compare_results(load_results(args.compare), results,
+									  args.threshold):
+		print("%-32s %10s -> %10s  %+6.1f%%%s" % (
+			comparison.name,
+			format_seconds(comparison.baseline),
+			format_seconds(comparison.current),
+			(comparison.ratio - 1) * 100,
+			"  REGRESSION" if comparison.regressed else ""))
+		regressed = regressed or comparison.regressed
+	return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
\ No newline at end of file
@@ -1,8 +1,14 @@
+import argparse
 import curses
+import os
+from app.dealpool import *
+from app.replay import *
 from app.solitaire import *
+from app.stats import *
+from app.tracing import *
 
 
-def main(screen):
+def main(screen, draw_count, tracer, recorder, stats, deal_pool):
 	curses.curs_set(0)
 	curses.use_default_colors()
 	# default foreground color
@@ -11,8 +17,47 @@ def main(screen):
 	curses.init_pair(2, curses.COLOR_RED, -1)
 	# select color
 	curses.init_pair(3, curses.COLOR_YELLOW, -1)
-	Solitaire(screen)
+	Solitaire(screen, draw_count, tracer, recorder=recorder, stats=stats,
+			  deal_pool=deal_pool)
 
 
 if __name__ == "__main__":
-	curses.wrapper(main)
\ No newline at end of file
+	parser = argparse.ArgumentParser(description="play solitaire")
+	parser.add_argument("--draw-count", type=int, default=1,
+						choices=DRAW_COUNTS, metavar="N",
+						help="cards turned over per draw (e.g. 3)")
+	parser.add_argument("--trace", default=os.environ.get("SOLITAIRE_TRACE"),
+						help="save per-keypress timings to this file on exit "
+						"(or set SOLITAIRE_TRACE)")
+	parser.add_argument("--trace-format", choices=["chrome", "json"],
+						default=os.environ.get("SOLITAIRE_TRACE_FORMAT", "chrome"),
+						help="chrome trace events, or plain json with a summary")
+	parser.add_argument("--record", default=os.environ.get("SOLITAIRE_RECORD"),
+						help="append every game played to this replay log "
+						"(or set SOLITAIRE_RECORD)")
+	parser.add_argument("--stats", default=default_stats_path(),
+						help="file finished games are saved to for stats.py "
+						"(default %(default)s, or set SOLITAIRE_STATS)")
+	parser.add_argument("--no-stats", action="store_true",
+						help="don't save finished games")
+	parser.add_argument("--winnable", action="store_true",
+						help="only deal games the solver has shown can be won")
+	parser.add_argument("--deal-pool", default=default_pool_path(),
+						help="where winnable deals are kept between runs "
+						"(default %(default)s, or set SOLITAIRE_DEAL_POOL)")
+	args = parser.parse_args()
+	tracer = KeyTracer() if args.trace else None
+	recorder = ReplayWriter(args.record) if args.record else None
+	stats = None if args.no_stats else StatsStore(args.stats)
+	deal_pool = None
+	if args.winnable:
+		deal_pool = DealPool(args.deal_pool, args.draw_count).start()
+	try:
+		curses.wrapper(main, args.draw_count, tracer, recorder, stats, deal_pool)
+	finally:
+		if deal_pool is not None:
+			deal_pool.stop(wait=False)
+		if tracer:
+			tracer.save(args.trace, args.trace_format)
+		if recorder:
+			recorder.close()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+from timeit import default_timer
+from app.replay import *
+
+
+def main():
+	parser = argparse.ArgumentParser(description="replay and verify solitaire replay logs")
+	parser.add_argument("paths", nargs="+", help="replay log files")
+	parser.add_argument("--validate", action="store_true",
+						help="check every move against the rules and the "
+						"incremental state after each one")
+	args = parser.parse_args()
+
+	summary = {"games": 0, "wins": 0, "moves": 0, "undos": 0, "errors": []}
+	start = default_timer()
+	for path in args.paths:
+		try:
+			games = replay_file(path, args.validate)
+		except (ReplayError, OSError, ValueError) as e:
+			summary["errors"].append("%s: %s" % (path, e))
+			continue
+		for game in games:
+			summary["games"] += 1
+			summary["wins"] += game.won
+			summary["moves"] += game.moves
+			summary["undos"] += game.undos
+	elapsed = default_timer() - start
+	summary["seconds"] = elapsed
+	summary["moves_per_second"] = summary["moves"] / elapsed if elapsed else 0.0
+	print(json.dumps(summary, indent=2))
+	return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
\ No newline at end of file
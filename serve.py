@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+import json
+from app.server import *
+
+
+async def serve(args):
+	server = await GameServer(args.host, args.port, args.draw_count,
+							  args.max_sessions).start()
+	print("serving solitaire on %s:%d, e.g. telnet %s %d" % (
+		server.host, server.port, server.host, server.port))
+	print(json.dumps({"session_bytes": server.stats()["session_bytes"]}))
+	await server.serve_forever()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="serve solitaire games over a line protocol")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=7777)
+	parser.add_argument("--draw-count", type=int, default=1,
+						choices=DRAW_COUNTS, metavar="N")
+	parser.add_argument("--max-sessions", type=int, default=10000)
+	parser.add_argument("--load-test", type=int, metavar="SESSIONS",
+						help="instead of serving, play this many local clients "
+						"at once and print latency and memory stats")
+	parser.add_argument("--messages", type=int, default=20,
+						help="messages per client in a load test")
+	args = parser.parse_args()
+
+	if args.load_test:
+		stats = asyncio.run(run_load_test(args.load_test, args.messages, args.draw_count))
+		print(json.dumps(stats, indent=2))
+		return
+	try:
+		asyncio.run(serve(args))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import argparse
+import json
+from app.simulation import *
+
+
+def main():
+	parser = argparse.ArgumentParser(description="play solitaire headlessly")
+	parser.add_argument("--policy", default="greedy",
+						help="policy name (%s) or module:function" %
+						", ".join(POLICIES))
+	parser.add_argument("--start", type=int, default=0, help="first deal id")
+	parser.add_argument("--count", type=int, default=1000,
+						help="number of deals to play")
+	parser.add_argument("--workers", type=int, default=1)
+	parser.add_argument("--chunk-size", type=int, default=256)
+	parser.add_argument("--max-moves", type=int, default=1000)
+	parser.add_argument("--draw-count", type=int, default=1,
+						choices=DRAW_COUNTS, metavar="N",
+						help="cards turned over per draw")
+	args = parser.parse_args()
+
+	stats = run_simulation(args.policy, args.start, args.count, args.workers,
+						   args.chunk_size, args.max_moves,
+						   draw_count=args.draw_count)
+	print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+	main()
\ No newline at end of file
@@ -0,0 +1,32 @@
+import argparse
+import json
+from app.stats import *
+
+
+def main():
+	parser = argparse.ArgumentParser(description="show or compact saved solitaire stats")
+	parser.add_argument("--path", default=default_stats_path(),
+						help="stats file (default %(default)s)")
+	commands = parser.add_subparsers(dest="command")
+	show = commands.add_parser("show", help="print the stats as json (the default)")
+	show.add_argument("--recent", type=int, default=0,
+					  help="also list the last RECENT games")
+	compact = commands.add_parser("compact", help="drop old games from the log, "
+								  "keeping the totals")
+	compact.add_argument("--keep", type=int, default=100,
+						 help="number of recent games to keep")
+	args = parser.parse_args()
+
+	store = StatsStore(args.path)
+	if args.command == "compact":
+		removed = store.compact(args.keep)
+		print("removed %d games from %s" % (removed, args.path))
+		return
+	data = store.summary().as_dict()
+	if args.command == "show" and args.recent:
+		data["recent"] = [record._asdict() for record in store.recent(args.recent)]
+	print(json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+	main()
\ No newline at end of file
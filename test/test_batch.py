@@ -0,0 +1,69 @@
+import unittest
+from random import Random
+from app.batch import *
+from test import test_gamehandler
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestBatchGameHandler(unittest.TestCase):
+	def assert_matches(self, batch, game_handlers):
+		mask = batch.legal_moves()
+		for i, game_handler in enumerate(game_handlers):
+			self.assertEqual({ACTION_MOVES[action] for action in mask[i].nonzero()[0]},
+							 set(game_handler.legal_moves()))
+			self.assertEqual(batch.game(i).position_hash(), game_handler.position_hash())
+
+	def test_deal_matches(self):
+		seeds = [0, 7, 2 ** 31, 12345]
+		self.assert_matches(BatchGameHandler(seeds), [GameHandler(seed) for seed in seeds])
+
+	def test_lockstep_play_matches(self):
+		# random games played move for move on both
+		for draw_count in (1, 3):
+			seeds = range(40)
+			batch = BatchGameHandler(seeds, draw_count)
+			game_handlers = [GameHandler(seed, draw_count) for seed in seeds]
+			rng = Random(draw_count)
+			for _ in range(150):
+				self.assert_matches(batch, game_handlers)
+				actions = []
+				for game_handler in game_handlers:
+					moves = game_handler.legal_moves()
+					if moves:
+						move = rng.choice(moves)
+						game_handler.apply(move)
+						actions.append(MOVE_ACTIONS[move])
+					else:
+						actions.append(NO_ACTION)
+				batch.apply(actions)
+			self.assert_matches(batch, game_handlers)
+
+	def test_from_games(self):
+		game_handler = test_gamehandler.almost_won_game()
+		batch = BatchGameHandler.from_games([game_handler, GameHandler(3)])
+		self.assert_matches(batch, [game_handler, GameHandler(3)])
+		self.assertEqual(batch.is_won().tolist(), [False, False])
+
+	def test_win(self):
+		game_handler = test_gamehandler.almost_won_game()
+		batch = BatchGameHandler.from_games([game_handler])
+		for move in game_handler.finishing_moves():
+			batch.apply([MOVE_ACTIONS[move]])
+		self.assertTrue(batch.is_won()[0])
+
+	def test_illegal_action(self):
+		batch = BatchGameHandler([1, 2])
+		before = batch.stock.copy()
+		with self.assertRaises(IllegalMoveError):
+			batch.apply([DRAW_ACTION, MOVE_ACTIONS[Move(COLUMN_TO_COLUMN, 0, 0, 1)]])
+		self.assertTrue((batch.stock == before).all())
+		self.assertEqual(batch.cursor.tolist(), [0, 0])
+
+	def test_action_moves(self):
+		self.assertEqual(len(ACTION_MOVES), NUM_ACTIONS)
+		for action, move in enumerate(ACTION_MOVES):
+			self.assertEqual(MOVE_ACTIONS[move], action)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import unittest
+from app.benchmark import *
+
+
+class TestBenchmark(unittest.TestCase):
+	def test_every_benchmark_runs(self):
+		for benchmark in BENCHMARKS:
+			result = run_benchmark(benchmark, repeat=1, scale=0)
+			self.assertEqual(result.number, 1)
+			self.assertGreater(result.seconds, 0)
+
+	def test_filter_by_prefix(self):
+		results = run_benchmarks(["move."], repeat=1, scale=0)
+		self.assertEqual(len(results), 4)
+
+	def test_compare_flags_regressions(self):
+		results = [BenchmarkResult("fast", 1.0, 1, 1),
+				   BenchmarkResult("slow", 2.0, 1, 1),
+				   BenchmarkResult("new", 1.0, 1, 1)]
+		baseline = {"fast": 1.0, "slow": 1.0}
+		comparisons = compare_results(baseline, results, threshold=0.1)
+		self.assertEqual([c.name for c in comparisons], ["fast", "slow"])
+		self.assertFalse(comparisons[0].regressed)
+		self.assertTrue(comparisons[1].regressed)
+		self.assertEqual(comparisons[1].ratio, 2.0)
+
+	def test_results_round_trip(self):
+		results = [BenchmarkResult("new_game", 0.5, 10, 3)]
+		data = results_as_dict(results)
+		self.assertEqual(data["results"]["new_game"]["seconds"], 0.5)
+		self.assertEqual(data["version"], FORMAT_VERSION)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
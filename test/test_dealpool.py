@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from time import sleep
+from app.dealpool import *
+from app.fakecurses import *
+from app.solitaire import *
+
+
+def write_pool(path, deals):
+	with open(path, "w") as f:
+		json.dump({"version": POOL_VERSION, "deals": deals}, f)
+
+
+class TestDealPool(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "deals.json")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_background_deals_are_winnable(self):
+		deal_pool = DealPool(self.path, size=2).start()
+		try:
+			deal_id = deal_pool.take(timeout=60)
+		finally:
+			deal_pool.stop()
+		self.assertIsNotNone(deal_id)
+		self.assertTrue(Solver(max_nodes=5000).is_winnable(GameHandler(deal_id)))
+
+	def test_pool_is_bounded_and_saved(self):
+		deal_pool = DealPool(self.path, size=2).start()
+		for _ in range(600):
+			if len(deal_pool) == 2:
+				break
+			sleep(0.1)
+		deal_pool.stop()
+		self.assertEqual(len(deal_pool), 2)
+		deals = deal_pool.deals()
+		self.assertEqual(DealPool(self.path).deals(), deals)
+
+	def test_taken_deals_are_not_dealt_again(self):
+		write_pool(self.path, {"1": [11, 12, 13], "3": [31]})
+		deal_pool = DealPool(self.path)
+		self.assertEqual(deal_pool.take(), 11)
+		self.assertEqual(DealPool(self.path).deals(), [12, 13])
+		# other draw counts' deals are left alone
+		self.assertEqual(DealPool(self.path, draw_count=3).deals(), [31])
+
+	def test_empty_pool_times_out(self):
+		self.assertIsNone(DealPool(self.path).take(timeout=0.01))
+
+	def test_solitaire_deals_from_the_pool(self):
+		write_pool(self.path, {"1": [101, 102]})
+		terminal = FakeTerminal(keys=[ord("n"), ord("q")])
+		solitaire = Solitaire(terminal.screen, term=terminal,
+							  deal_pool=DealPool(self.path))
+		self.assertEqual(solitaire.game_handler.seed, 102)
+		self.assertEqual(DealPool(self.path).deals(), [])
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
@@ -0,0 +1,34 @@
+import unittest
+from app.gamehandler import *
+
+
+class TestDeals(unittest.TestCase):
+	def test_deal_is_a_permutation(self):
+		self.assertEqual(sorted(deal_permutation(42)), list(range(52)))
+
+	def test_deal_is_deterministic(self):
+		self.assertEqual(deal_permutation(7), deal_permutation(7))
+		self.assertNotEqual(deal_permutation(7), deal_permutation(8))
+
+	def test_stream_matches_single_deals(self):
+		deals = list(deal_stream(100, 10, batch_size=3))
+		self.assertEqual(deals, [deal_permutation(i) for i in range(100, 110)])
+
+	@unittest.skipIf(numpy is None, "numpy is not installed")
+	def test_batch_matches_single_deals(self):
+		batch = deal_batch(2 ** 31, 50)
+		for i, row in enumerate(batch):
+			self.assertEqual(row.tobytes(), deal_permutation(2 ** 31 + i))
+
+	def test_new_game_seed(self):
+		game_handler = GameHandler(seed=1234)
+		other = GameHandler()
+		other.new_game(seed=1234)
+		self.assertEqual(game_handler.seed, 1234)
+		self.assertEqual(game_handler.deck, other.deck)
+		self.assertEqual(game_handler.columns, other.columns)
+		self.assertEqual(game_handler.position_hash(), other.position_hash())
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
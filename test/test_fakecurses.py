@@ -0,0 +1,77 @@
+import unittest
+from app.fakecurses import *
+from app.uihandler import *
+
+
+class TestFakeCurses(unittest.TestCase):
+	def test_subwindows_share_the_screen(self):
+		terminal = FakeTerminal(5, 10)
+		window = terminal.screen.subwin(2, 4, 1, 3)
+		window.addstr(1, 1, "ab")
+		self.assertEqual(terminal.screen.text()[2], "    ab    ")
+
+	def test_addstr_outside_window(self):
+		terminal = FakeTerminal(5, 10)
+		self.assertRaises(error, terminal.screen.addstr, 0, 9, "ab")
+
+	def test_nothing_is_emitted_before_update(self):
+		terminal = FakeTerminal(5, 10)
+		terminal.screen.addstr(0, 0, "abc")
+		terminal.screen.noutrefresh()
+		self.assertEqual(terminal.cells_written, 3)
+		self.assertEqual(terminal.refresh_calls, 1)
+		self.assertEqual(terminal.cells_emitted, 0)
+		self.assertEqual(terminal.text()[0], " " * 10)
+		terminal.doupdate()
+		self.assertEqual(terminal.cells_emitted, 3)
+		self.assertEqual(terminal.text()[0], "abc" + " " * 7)
+
+	def test_only_changes_are_emitted(self):
+		terminal = FakeTerminal(5, 10)
+		terminal.screen.addstr(0, 0, "abc")
+		terminal.screen.refresh()
+		first_bytes = terminal.bytes_emitted
+		# one cursor move and the three characters
+		self.assertEqual(first_bytes, len(MOVE_CURSOR % (1, 1)) + 3)
+		terminal.screen.addstr(0, 0, "abd")
+		terminal.screen.refresh()
+		self.assertEqual(terminal.cells_emitted, 4)
+		terminal.screen.refresh()
+		self.assertEqual(terminal.cells_emitted, 4)
+		self.assertEqual(terminal.updates, 3)
+
+	def test_clear_repaints_everything(self):
+		terminal = FakeTerminal(5, 10)
+		terminal.screen.addstr(0, 0, "abc")
+		terminal.screen.refresh()
+		terminal.screen.clear()
+		terminal.screen.addstr(0, 0, "abc")
+		terminal.screen.refresh()
+		self.assertEqual(terminal.cells_emitted, 6)
+
+	def test_pad_viewport(self):
+		terminal = FakeTerminal(5, 10)
+		pad = terminal.newpad(20, 4)
+		pad.addstr(10, 0, "abcd")
+		pad.noutrefresh(9, 0, 1, 2, 2, 5)
+		terminal.doupdate()
+		self.assertEqual(terminal.text()[2], "  abcd    ")
+
+	def test_ui_repaints_only_what_changed(self):
+		terminal = FakeTerminal(50, 100)
+		ui_handler = GameUiHandler(terminal.screen, GameHandler(1), term=terminal)
+		startup = terminal.counters()
+		self.assertEqual(startup["updates"], 1)
+		terminal.reset_counters()
+		ui_handler.draw()
+		ui_handler.render()
+		self.assertEqual(terminal.updates, 1)
+		self.assertLess(terminal.bytes_emitted, startup["bytes_emitted"] / 4)
+		terminal.reset_counters()
+		ui_handler.render()
+		self.assertEqual(terminal.refresh_calls, 0)
+		self.assertEqual(terminal.cells_emitted, 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
@@ -0,0 +1,45 @@
+import unittest
+from app.fakecurses import *
+from app.frames import *
+from app.uihandler import *
+
+
+class TestFrameBuilder(unittest.TestCase):
+	def test_matches_curses_screen(self):
+		# the frame is what GameUiHandler puts on the terminal
+		terminal = FakeTerminal()
+		game_handler = GameHandler(6)
+		GameUiHandler(terminal.screen, game_handler, term=terminal)
+		lines = FrameBuilder().build(game_handler)
+		shown = [line.rstrip() for line in terminal.text()]
+		for y, line in enumerate(lines):
+			if y != LABELS_Y:
+				self.assertEqual(line, shown[y])
+
+	def test_shows_moves(self):
+		game_handler = GameHandler(6)
+		builder = FrameBuilder()
+		before = builder.build(game_handler)
+		game_handler.draw()
+		after = builder.build(game_handler)
+		self.assertNotEqual(before, after)
+
+	def test_empty_stock(self):
+		game_handler = GameHandler(6)
+		game_handler.stock = []
+		game_handler.cursor = 0
+		game_handler.refresh()
+		self.assertNotIn("/", "".join(FrameBuilder().build(game_handler)))
+
+	def test_selected_column_label(self):
+		lines = FrameBuilder().build(GameHandler(6), selected=3, num_selected=1)
+		self.assertIn("[3]", lines[LABELS_Y])
+		self.assertNotIn("[", "".join(FrameBuilder().build(GameHandler(6))))
+
+	def test_fits_width(self):
+		for line in FrameBuilder().build(GameHandler(6)):
+			self.assertLessEqual(len(line), WIDTH)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
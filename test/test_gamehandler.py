@@ -1,5 +1,5 @@
 import unittest
-from random import choice
+from random import choice, Random
 from app.gamehandler import *
 
 
@@ -27,7 +27,7 @@ class TestGameHandler(unittest.TestCase):
 		game_handler.draw()
 		self.assertEqual(game_handler.deck, [card1])
 		self.assertEqual(game_handler.discard, [card2])
-		self.assertTrue(card2.face_up)
+		self.assertTrue(game_handler.discard[-1].face_up)
 
 	def test_draw_empty_deck(self):
 		game_handler = GameHandler()
@@ -38,8 +38,8 @@ class TestGameHandler(unittest.TestCase):
 		game_handler.draw()
 		self.assertEqual(game_handler.deck, [card2])
 		self.assertEqual(game_handler.discard, [card1])
-		self.assertTrue(card1.face_up)
-		self.assertFalse(card2.face_up)
+		self.assertTrue(game_handler.discard[-1].face_up)
+		self.assertFalse(game_handler.deck[-1].face_up)
 
 	def test_discard_ace_to_ace_pile(self):
 		game_handler = GameHandler()
@@ -221,6 +221,380 @@ class TestGameHandler(unittest.TestCase):
 		self.assertFalse(game_handler.columns[0])
 		self.assertEqual(game_handler.columns[1], [king, queen, jack])
 
+	def test_column_to_column_no_cards(self):
+		# the bottom card of column 0 is a face-up king
+		game_handler = GameHandler()
+		game_handler.columns[0] = [Card(13, "spades").flip()]
+		game_handler.columns[1] = []
+		game_handler.refresh()
+		for num_cards in (0, -1):
+			self.assertRaises(IllegalMoveError, game_handler.column_to_column,
+							  0, 1, num_cards)
+		self.assertFalse(game_handler.can_undo())
+
+
+class TestLegalMoves(unittest.TestCase):
+	def test_matches_exhaustive_search(self):
+		rng = Random(3)
+		for _ in range(5):
+			game_handler = GameHandler()
+			for _ in range(150):
+				moves = game_handler.legal_moves()
+				self.assertEqual(set(moves), find_legal_moves(game_handler))
+				game_handler.apply(rng.choice(moves))
+
+	def test_multi_card_column_move(self):
+		game_handler = GameHandler()
+		king = Card(13, choice(["spades", "clubs"]))
+		queen = Card(12, choice(["hearts", "diamonds"]))
+		jack = Card(11, choice(["spades", "clubs"]))
+		game_handler.columns[0] = [jack, king.flip(), queen.flip()]
+		game_handler.columns[1] = []
+		game_handler.refresh()
+		move = Move(COLUMN_TO_COLUMN, 0, 1, 2)
+		self.assertIn(move, game_handler.legal_moves())
+		game_handler.apply(move)
+		self.assertEqual(game_handler.columns[1], [king, queen])
+		self.assertTrue(game_handler.columns[0][-1].face_up)
+
+	def test_only_touched_pairs_are_reexamined(self):
+		game_handler = GameHandler()
+		game_handler.legal_moves()
+		game_handler.draw()
+		self.assertEqual(game_handler._dirty_piles, {GameHandler.DISCARD})
+
+	def test_face_down_cards_cannot_move(self):
+		game_handler = GameHandler()
+		king = Card(13, get_random_suit())
+		game_handler.columns[0] = [king, get_random_card().flip()]
+		game_handler.columns[1] = []
+		self.assertRaises(IllegalMoveError,
+						  game_handler.column_to_column, 0, 1, 2)
+
+
+class TestPositionHash(unittest.TestCase):
+	def test_incremental_hash_matches_recomputation(self):
+		rng = Random(5)
+		game_handler = GameHandler(debug=True)
+		for _ in range(300):
+			game_handler.apply(rng.choice(game_handler.legal_moves()))
+			self.assertEqual(game_handler.position_hash(),
+							 game_handler.compute_hash())
+
+	def test_debug_mode_detects_stale_hash(self):
+		game_handler = GameHandler(debug=True)
+		game_handler.stock.reverse()
+		self.assertRaises(AssertionError, game_handler.draw)
+
+	def test_refresh_rehashes(self):
+		game_handler = GameHandler()
+		game_handler.columns[0] = []
+		game_handler.refresh()
+		self.assertEqual(game_handler.position_hash(),
+						 game_handler.compute_hash())
+
+	def test_same_position_same_hash(self):
+		game_handler = GameHandler()
+		other = game_handler.copy()
+		self.assertEqual(game_handler.position_hash(), other.position_hash())
+		other.draw()
+		self.assertNotEqual(game_handler.position_hash(), other.position_hash())
+
+	def test_relocate_matches_moved_pile(self):
+		game_handler = GameHandler(6)
+		moved = game_handler.copy()
+		moved.columns[1], moved.columns[4] = moved.columns[4], []
+		moved.refresh()
+		column = game_handler.columns[4]
+		self.assertEqual(game_handler.position_hash() ^
+						 zobrist_pile(COLUMN_LOCATION + 1, game_handler.columns[1]) ^
+						 zobrist_relocate(column, COLUMN_LOCATION + 4, COLUMN_LOCATION + 1),
+						 moved.position_hash())
+
+
+class TestUndo(unittest.TestCase):
+	def test_undo_restores_every_position(self):
+		rng = Random(8)
+		game_handler = GameHandler(debug=True)
+		positions = []
+		for _ in range(300):
+			positions.append(snapshot(game_handler))
+			game_handler.apply(rng.choice(game_handler.legal_moves()))
+		final = snapshot(game_handler)
+		while positions:
+			game_handler.undo()
+			self.assertEqual(snapshot(game_handler), positions.pop())
+		self.assertFalse(game_handler.can_undo())
+		while game_handler.can_redo():
+			game_handler.redo()
+		self.assertEqual(snapshot(game_handler), final)
+
+	def test_undo_flip(self):
+		game_handler = GameHandler()
+		king = Card(13, get_random_suit())
+		card = get_random_card()
+		game_handler.columns[0] = [card, king.flip()]
+		game_handler.columns[1] = []
+		game_handler.refresh()
+		game_handler.column_to_column(0, 1)
+		self.assertTrue(game_handler.columns[0][0].face_up)
+		game_handler.undo()
+		self.assertFalse(game_handler.columns[0][0].face_up)
+		self.assertEqual(game_handler.columns[0], [card, king])
+		self.assertFalse(game_handler.columns[1])
+
+	def test_undo_recycle(self):
+		game_handler = GameHandler()
+		card1 = get_random_card()
+		card2 = get_random_card()
+		game_handler.deck = []
+		game_handler.discard = [card1.flip(), card2.flip()]
+		game_handler.refresh()
+		game_handler.draw()
+		game_handler.undo()
+		self.assertEqual(game_handler.deck, [])
+		self.assertEqual(game_handler.discard, [card1, card2])
+		self.assertTrue(game_handler.discard[0].face_up)
+
+	def test_new_move_clears_redo(self):
+		game_handler = GameHandler()
+		game_handler.draw()
+		game_handler.undo()
+		self.assertTrue(game_handler.can_redo())
+		game_handler.draw()
+		self.assertFalse(game_handler.can_redo())
+
+	def test_nothing_to_undo(self):
+		game_handler = GameHandler()
+		self.assertRaises(IllegalMoveError, game_handler.undo)
+		self.assertRaises(IllegalMoveError, game_handler.redo)
+
+
+class TestDrawCount(unittest.TestCase):
+	def test_draw_count_is_checked(self):
+		for draw_count in (0, -1, 32):
+			self.assertRaises(ValueError, GameHandler, draw_count=draw_count)
+		game_handler = GameHandler(draw_count=31)
+		self.assertRaises(ValueError, game_handler.new_game, draw_count=0)
+		self.assertEqual(game_handler.draw_count, 31)
+
+	def test_draw_three(self):
+		game_handler = GameHandler(draw_count=3)
+		cards = [get_random_card() for _ in range(4)]
+		game_handler.deck = cards
+		game_handler.discard = []
+		game_handler.draw()
+		self.assertEqual(game_handler.deck, cards[:1])
+		self.assertEqual(game_handler.discard, cards[:0:-1])
+		self.assertTrue(game_handler.discard_top().face_up)
+		game_handler.draw()
+		self.assertEqual(game_handler.deck, [])
+		game_handler.draw()
+		self.assertEqual(game_handler.discard, cards[:0:-1])
+		self.assertEqual(game_handler.deck, cards[:1])
+
+	def test_draw_only_moves_cursor(self):
+		game_handler = GameHandler(draw_count=3)
+		stock = game_handler.stock
+		game_handler.draw()
+		self.assertIs(game_handler.stock, stock)
+		self.assertEqual(game_handler.cursor, 3)
+
+	def test_new_game_keeps_draw_count(self):
+		game_handler = GameHandler(draw_count=3)
+		game_handler.new_game()
+		self.assertEqual(game_handler.draw_count, 3)
+
+	def test_draw_three_play_is_consistent(self):
+		rng = Random(13)
+		game_handler = GameHandler(draw_count=3, debug=True)
+		for _ in range(150):
+			moves = game_handler.legal_moves()
+			self.assertEqual(set(moves), find_legal_moves(game_handler))
+			game_handler.apply(rng.choice(moves))
+		while game_handler.can_undo():
+			game_handler.undo()
+		self.assertEqual(snapshot(game_handler),
+						 snapshot(GameHandler(game_handler.seed)))
+
+
+class TestAutoFinish(unittest.TestCase):
+	def test_face_down_count_is_incremental(self):
+		rng = Random(5)
+		game_handler = GameHandler(debug=True)
+		self.assertEqual(game_handler.face_down_count, 21)
+		for _ in range(200):
+			game_handler.apply(rng.choice(game_handler.legal_moves()))
+		while game_handler.can_undo():
+			game_handler.undo()
+		self.assertEqual(game_handler.face_down_count, 21)
+
+	def test_not_while_cards_are_face_down(self):
+		game_handler = GameHandler()
+		self.assertFalse(game_handler.can_auto_finish())
+		self.assertIsNone(game_handler.auto_finish())
+
+	def test_auto_finish(self):
+		game_handler = almost_won_game()
+		start = snapshot(game_handler)
+		self.assertTrue(game_handler.can_auto_finish())
+		moves = game_handler.auto_finish()
+		self.assertTrue(game_handler.is_won())
+		self.assertEqual(moves.count(Move(DISCARD_TO_ACE_PILE)), 2)
+		for _ in moves:
+			game_handler.undo()
+		self.assertEqual(snapshot(game_handler), start)
+
+	def test_draw_three_needs_an_empty_stock(self):
+		game_handler = almost_won_game()
+		game_handler.draw_count = 3
+		self.assertFalse(game_handler.can_auto_finish())
+		game_handler.ace_piles["diamonds"].append(Card(9, "diamonds").flip())
+		game_handler.ace_piles["hearts"].append(Card(10, "hearts").flip())
+		game_handler.stock = []
+		game_handler.cursor = 0
+		game_handler.refresh()
+		self.assertTrue(game_handler.auto_finish())
+		self.assertTrue(game_handler.is_won())
+
+
+class TestPack(unittest.TestCase):
+	def test_round_trip(self):
+		game_handler = GameHandler(11, draw_count=3)
+		rng = Random(11)
+		for _ in range(40):
+			game_handler.apply(rng.choice(game_handler.legal_moves()))
+			unpacked = GameHandler.from_packed(game_handler.pack(), seed=11)
+			self.assertEqual(snapshot(unpacked), snapshot(game_handler))
+			self.assertEqual(unpacked.position_hash(), game_handler.position_hash())
+			self.assertEqual(unpacked.legal_moves(), game_handler.legal_moves())
+			self.assertEqual(unpacked.draw_count, 3)
+
+	def test_about_one_byte_per_card(self):
+		data = GameHandler(3).pack()
+		self.assertEqual(len(data), 2 + NUM_PILES + len(CARDS))
+		self.assertIsInstance(data, bytes)
+
+	def test_same_position_same_bytes(self):
+		game_handler = GameHandler(4)
+		packed = game_handler.pack()
+		game_handler.draw()
+		self.assertNotEqual(game_handler.pack(), packed)
+		game_handler.undo()
+		self.assertEqual(game_handler.pack(), packed)
+
+
+class TestStackTables(unittest.TestCase):
+	def test_column_table(self):
+		game_handler = GameHandler()
+		self.assertEqual(len(CAN_STACK_ON_COLUMN), 52)
+		for card in CARDS:
+			row = CAN_STACK_ON_COLUMN[card.ordinal]
+			self.assertEqual(len(row), 53)
+			self.assertEqual(row[EMPTY_PILE], card.value == 13)
+			self.assertEqual(game_handler._can_add_to_column(card, []), card.value == 13)
+			for top in CARDS:
+				fits = (card.value == top.value - 1 and card.is_red != top.is_red)
+				self.assertEqual(row[top.ordinal], fits)
+				self.assertEqual(game_handler._can_add_to_column(card, [top.flip()]), fits)
+
+	def test_ace_pile_table(self):
+		# ace piles only ever hold one suit
+		game_handler = GameHandler()
+		for card in CARDS:
+			row = CAN_STACK_ON_ACE_PILE[card.ordinal]
+			self.assertEqual(row[EMPTY_PILE], card.value == 1)
+			self.assertEqual(game_handler._can_add_to_ace_pile(card, []), card.value == 1)
+			for top in CARDS:
+				fits = card.value == top.value + 1 and card.suit == top.suit
+				self.assertEqual(row[top.ordinal], fits)
+				if top.suit == card.suit:
+					ace_pile = [Card(value, card.suit).flip() for value in range(1, top.value + 1)]
+					self.assertEqual(game_handler._can_add_to_ace_pile(card, ace_pile), fits)
+
+
+class TestCard(unittest.TestCase):
+	def test_cards_are_interned(self):
+		card = get_random_card()
+		self.assertIs(Card(card.value, card.suit), card)
+		self.assertIs(card.flip().flip(), card)
+		self.assertIs(CARDS[card.ordinal], card)
+
+	def test_flip_keeps_identity(self):
+		card = get_random_card()
+		flipped = card.flip()
+		self.assertTrue(flipped.face_up)
+		self.assertFalse(card.face_up)
+		self.assertEqual(flipped, card)
+		self.assertEqual(hash(flipped), hash(card))
+		self.assertIs(card_from_code(flipped.code), flipped)
+
+	def test_card_values_are_checked(self):
+		for value in (0, 14, -1):
+			self.assertRaises(ValueError, Card, value, "clubs")
+		self.assertRaises(ValueError, Card, 1, "stars")
+
+	def test_cards_are_immutable(self):
+		card = get_random_card()
+		with self.assertRaises(AttributeError):
+			card.face_up = True
+
+	def test_new_game_does_not_allocate_cards(self):
+		game_handler = GameHandler()
+		cards = game_handler.deck + [card for column in game_handler.columns
+									 for card in column]
+		self.assertEqual(len(set(cards)), 52)
+		for card in cards:
+			self.assertIs(card_from_code(card.code), card)
+
+
+def find_legal_moves(game_handler):
+	# tries every possible move on a copy of the game
+	candidates = [Move(DRAW), Move(DISCARD_TO_ACE_PILE)]
+	for i in range(game_handler.COLUMNS):
+		candidates.append(Move(DISCARD_TO_COLUMN, dest=i))
+		candidates.append(Move(COLUMN_TO_ACE_PILE, i))
+		for j in range(game_handler.COLUMNS):
+			for num_cards in range(1, len(game_handler.columns[i]) + 1):
+				if i != j:
+					candidates.append(Move(COLUMN_TO_COLUMN, i, j, num_cards))
+	legal = set()
+	for move in candidates:
+		try:
+			game_handler.copy().apply(move)
+			legal.add(move)
+		except (IllegalMoveError, IndexError):
+			pass
+	return legal
+
+
+def almost_won_game():
+	# every card is face up or in the stock: the black suits are up, the
+	# hearts are up to 9 and the diamonds up to 8
+	game_handler = GameHandler(debug=True)
+	for suit in Card.SUITS:
+		top = {"hearts": 9, "diamonds": 8}.get(suit, 13)
+		game_handler.ace_piles[suit] = [Card(value, suit).flip()
+										for value in range(1, top + 1)]
+	game_handler.columns = [[Card(value, suit).flip()] for value, suit in
+							[(13, "hearts"), (12, "hearts"), (11, "hearts"),
+							 (13, "diamonds"), (12, "diamonds"),
+							 (11, "diamonds"), (10, "diamonds")]]
+	game_handler.stock = [Card(9, "diamonds"), Card(10, "hearts")]
+	game_handler.cursor = 1
+	game_handler.refresh()
+	return game_handler
+
+
+def snapshot(game_handler):
+	return ([card.code for card in game_handler.deck],
+			[card.code for card in game_handler.discard],
+			{suit: [card.code for card in pile]
+			 for suit, pile in game_handler.ace_piles.items()},
+			[[card.code for card in column] for column in game_handler.columns],
+			game_handler.position_hash(),
+			set(game_handler.legal_moves()))
+
 
 def get_random_suit():
 	return choice(list(Card.SUITS.keys()))
@@ -0,0 +1,53 @@
+import unittest
+from time import perf_counter
+from app.hints import *
+from test import test_gamehandler
+
+
+class TestHintEngine(unittest.TestCase):
+	def test_hint_is_legal(self):
+		engine = HintEngine()
+		for seed in range(5):
+			game_handler = GameHandler(seed)
+			self.assertIn(engine.hint(game_handler), game_handler.legal_moves())
+
+	def test_budget_is_kept(self):
+		engine = HintEngine(budget=0.01, max_depth=100)
+		game_handler = GameHandler(9)
+		start = perf_counter()
+		engine.hint(game_handler)
+		# generous, as the deadline is only checked between positions
+		self.assertLess(perf_counter() - start, 0.2)
+		self.assertLess(engine.depth_reached, 100)
+
+	def test_ace_pile_move_first(self):
+		game_handler = GameHandler(2)
+		game_handler.columns[3].append(Card(1, "clubs").flip())
+		game_handler.refresh()
+		self.assertEqual(HintEngine().hint(game_handler),
+						 Move(COLUMN_TO_ACE_PILE, 3))
+
+	def test_finishing_move(self):
+		game_handler = test_gamehandler.almost_won_game()
+		self.assertEqual(HintEngine().hint(game_handler),
+						 game_handler.finishing_moves()[0])
+
+	def test_cache_is_reused(self):
+		engine = HintEngine(budget=1, max_depth=4)
+		game_handler = GameHandler(4)
+		move = engine.hint(game_handler)
+		nodes = engine.nodes_expanded
+		self.assertEqual(engine.hint(game_handler), move)
+		self.assertEqual(engine.nodes_expanded, nodes)
+		self.assertGreater(engine.cache_hits, 0)
+
+	def test_new_game_clears_cache(self):
+		engine = HintEngine(budget=1, max_depth=3)
+		engine.hint(GameHandler(4))
+		engine.hint(GameHandler(5))
+		self.assertNotIn(GameHandler(4).position_hash(), engine._cache)
+		self.assertIn(GameHandler(5).position_hash(), engine._cache)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
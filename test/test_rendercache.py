@@ -0,0 +1,53 @@
+import unittest
+from app.rendercache import *
+
+
+class TestRenderCache(unittest.TestCase):
+	def test_column_layout_is_cached(self):
+		cache = RenderCache()
+		column = [Card(13, "spades"), Card(12, "hearts").flip()]
+		rows = cache.column_rows(column)
+		self.assertIs(cache.column_rows(list(column)), rows)
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+		self.assertEqual(cache.hit_rate, 0.5)
+
+	def test_face_rows_are_shared_by_a_card(self):
+		cache = RenderCache()
+		card = Card(7, "diamonds")
+		rows = cache.face_rows(card)
+		self.assertIs(cache.face_rows(card.flip()), rows)
+		self.assertEqual(len(cache._faces), 1)
+		self.assertIn((1, 1, card.suit_symbol + "7", RED), rows)
+
+	def test_face_up_state_changes_layout(self):
+		cache = RenderCache()
+		king = Card(13, "spades")
+		self.assertNotEqual(cache.column_rows([king]),
+							cache.column_rows([king.flip()]))
+
+	def test_column_rows(self):
+		cache = RenderCache()
+		queen = Card(12, "hearts").flip()
+		rows = cache.column_rows([Card(13, "spades"), queen])
+		self.assertEqual(rows[0], (0, 0, TOP_BORDER, PLAIN))
+		self.assertEqual(rows[1], (1, 0, TOP_BORDER, PLAIN))
+		self.assertIn((2, 1, queen.suit_symbol + "Q", RED), rows)
+		self.assertEqual(rows[-1], (Card.HEIGHT, 0, BOTTOM_BORDER, PLAIN))
+
+	def test_selection_outlines_selected_cards(self):
+		cache = RenderCache()
+		column = [Card(13, "spades").flip(), Card(12, "hearts").flip()]
+		rows = cache.column_rows(column, 2)
+		selected = [row for row in rows if row[3] == SELECT]
+		self.assertEqual(selected[0], (Card.HEIGHT + 1, 0, BOTTOM_BORDER, SELECT))
+		self.assertEqual(selected[-1], (0, 0, TOP_BORDER, SELECT))
+
+	def test_bounded(self):
+		cache = RenderCache(max_entries=2)
+		for value in range(1, 5):
+			cache.column_rows([Card(value, "clubs")])
+		self.assertLessEqual(len(cache._columns), 2)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
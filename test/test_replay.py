@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from random import Random
+from app.replay import *
+
+
+def record_games(path, seeds, num_moves=80):
+	# random games with the odd undo. returns the final position hashes
+	rng = Random(len(seeds))
+	hashes = []
+	with ReplayWriter(path) as writer:
+		for seed in seeds:
+			game_handler = GameHandler(seed, 1 + seed % 3, recorder=writer)
+			for _ in range(num_moves):
+				game_handler.apply(rng.choice(game_handler.legal_moves()))
+				if rng.random() < 0.1:
+					game_handler.undo()
+			hashes.append(game_handler.position_hash())
+	return hashes
+
+
+class TestReplay(unittest.TestCase):
+	def setUp(self):
+		handle, self.path = tempfile.mkstemp()
+		os.close(handle)
+		os.remove(self.path)
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+	def test_round_trip(self):
+		hashes = record_games(self.path, range(10))
+		for validate in (False, True):
+			games = replay_file(self.path, validate)
+			self.assertEqual([game.seed for game in games], list(range(10)))
+			self.assertEqual([game.position_hash for game in games], hashes)
+			self.assertEqual([game.draw_count for game in games],
+							 [1 + seed % 3 for seed in range(10)])
+
+	def test_two_bytes_per_move(self):
+		record_games(self.path, range(3), num_moves=50)
+		games = replay_file(self.path)
+		num_words = sum(game.moves + game.undos + 1 + SEED_WORDS for game in games)
+		self.assertEqual(os.path.getsize(self.path), len(HEADER) + num_words * 2)
+
+	def test_logs_are_appended(self):
+		first = record_games(self.path, [1])
+		second = record_games(self.path, [2])
+		games = replay_file(self.path)
+		self.assertEqual([game.position_hash for game in games], first + second)
+
+	def test_every_move_encodes(self):
+		for move, word in MOVE_WORDS.items():
+			self.assertEqual(WORD_MOVES[word], move)
+			self.assertLess(word, 1 << 16)
+			self.assertNotIn(word & 7, (UNDO, START))
+
+	def test_interrupted_write_is_ignored(self):
+		hashes = record_games(self.path, [4])
+		with open(self.path, "ab") as f:
+			f.write(b"\x01")
+		self.assertEqual([game.position_hash for game in replay_file(self.path)], hashes)
+
+	def test_illegal_move_is_reported(self):
+		with ReplayWriter(self.path) as writer:
+			writer.start_game(1, 1)
+			writer.record_undo()
+		for validate in (False, True):
+			self.assertRaises(ReplayError, replay_file, self.path, validate)
+
+	def test_copies_are_not_recorded(self):
+		with ReplayWriter(self.path) as writer:
+			game_handler = GameHandler(5, recorder=writer)
+			game_handler.copy().draw()
+		self.assertEqual(replay_file(self.path)[0].moves, 0)
+
+	def test_not_a_log(self):
+		with open(self.path, "wb") as f:
+			f.write(b"nope")
+		self.assertRaises(ReplayError, replay_file, self.path)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
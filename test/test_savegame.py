@@ -0,0 +1,81 @@
+import unittest
+from random import Random
+from app.savegame import *
+from test.test_gamehandler import snapshot
+
+
+def played_game(seed, num_moves, draw_count=1):
+	rng = Random(seed)
+	game_handler = GameHandler(seed, draw_count)
+	for _ in range(num_moves):
+		game_handler.apply(rng.choice(game_handler.legal_moves()))
+	return game_handler
+
+
+class TestSaveGame(unittest.TestCase):
+	def test_round_trip(self):
+		for seed in range(20):
+			game_handler = played_game(seed, 60, draw_count=1 + seed % 3)
+			game_handler.undo()
+			game_handler.undo()
+			loaded = load_game(save_game(game_handler))
+			self.assertEqual(snapshot(loaded), snapshot(game_handler))
+			self.assertEqual(loaded.seed, game_handler.seed)
+			self.assertEqual(loaded.draw_count, game_handler.draw_count)
+			self.assertEqual(loaded.position_hash(), game_handler.position_hash())
+			self.assertEqual(loaded.face_down_count, game_handler.face_down_count)
+			self.assertEqual(loaded.legal_moves(), game_handler.legal_moves())
+			self.assertEqual(loaded._history, game_handler._history)
+			self.assertEqual(loaded._redo, game_handler._redo)
+
+	def test_loaded_game_can_be_undone(self):
+		game_handler = played_game(3, 80)
+		loaded = load_game(save_game(game_handler))
+		while loaded.can_undo():
+			loaded.undo()
+		self.assertEqual(snapshot(loaded), snapshot(GameHandler(3)))
+
+	def test_about_one_byte_per_card(self):
+		data = save_game(GameHandler(7))
+		self.assertEqual(len(data), HEADER.size + 12 + len(CARDS) +
+						 COUNT.size * 2 + CHECKSUM.size)
+
+	def test_many_games(self):
+		games = [played_game(seed, 30) for seed in range(10)]
+		loaded = list(load_games(save_games(games)))
+		self.assertEqual([snapshot(game) for game in loaded],
+						 [snapshot(game) for game in games])
+
+	def test_corruption_is_detected(self):
+		data = bytearray(save_game(played_game(1, 20)))
+		data[HEADER.size + 3] ^= 1
+		self.assertRaises(SaveGameError, load_game, bytes(data))
+
+	def test_truncation_is_detected(self):
+		data = save_game(played_game(1, 20))
+		for length in (0, 5, len(data) // 2, len(data) - 1):
+			self.assertRaises(SaveGameError, load_game, data[:length])
+
+	def test_bad_cards_are_rejected(self):
+		# with a valid checksum, so only the card check can catch them
+		def resigned(data):
+			body = bytes(data[:-CHECKSUM.size])
+			return body + CHECKSUM.pack(crc32(body))
+		first_card = HEADER.size + 1
+		for code in (52, 63, 116, 127):
+			data = bytearray(save_game(GameHandler(1)))
+			data[first_card] = code
+			self.assertRaises(SaveGameError, load_game, resigned(data))
+		data = bytearray(save_game(GameHandler(1)))
+		# the same card twice
+		data[first_card] = data[first_card + 1]
+		self.assertRaises(SaveGameError, load_game, resigned(data))
+
+	def test_unknown_version(self):
+		data = bytearray(save_game(GameHandler(1)))
+		data[len(MAGIC)] = FORMAT_VERSION + 1
+		self.assertRaises(SaveGameError, load_game, bytes(data))
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
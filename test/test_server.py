@@ -0,0 +1,151 @@
+import asyncio
+import unittest
+from app.server import *
+from app.server import _encode, _read_reply
+from app import server as server_module
+from test import test_gamehandler
+
+
+class TestSession(unittest.TestCase):
+	def setUp(self):
+		self.session = Session(FrameBuilder(), 6)
+
+	def test_move(self):
+		reply = self.session.handle("draw")
+		self.assertEqual(reply[0], "ok")
+		self.assertEqual(reply[1:], self.session.frame())
+		self.assertEqual(self.session.game_handler.cursor, 1)
+
+	def test_illegal_move(self):
+		reply = self.session.handle("ca 9")
+		self.assertEqual(reply[0], "error bad arguments for ca")
+		reply = self.session.handle("dc 0")
+		self.assertEqual(reply[0], "error illegal move")
+
+	def test_bad_commands(self):
+		self.assertEqual(self.session.handle("")[0], "error empty command")
+		self.assertTrue(self.session.handle("fly")[0].startswith("error unknown"))
+		self.assertEqual(self.session.handle("cc x 1")[0], "error bad arguments for cc")
+		self.assertEqual(self.session.handle("cc -1 1")[0], "error bad arguments for cc")
+		self.assertEqual(self.session.handle("cc 0 6 0")[0], "error bad arguments for cc")
+		self.assertFalse(self.session.game_handler.can_undo())
+
+	def test_undo_and_new(self):
+		self.session.handle("draw")
+		self.assertEqual(self.session.handle("undo")[1], "undo draw")
+		self.assertEqual(self.session.game_handler.cursor, 0)
+		self.session.handle("new 3")
+		self.assertEqual(self.session.game_handler.seed, 3)
+
+	def test_hint(self):
+		reply = self.session.handle("hint")
+		self.assertTrue(reply[1].startswith("hint "))
+
+	def test_won(self):
+		self.session.game_handler = test_gamehandler.almost_won_game()
+		self.assertEqual(self.session.handle("show")[0], "won")
+
+	def test_undo_after_won(self):
+		self.session.game_handler = test_gamehandler.almost_won_game()
+		self.session.handle("show")
+		self.assertEqual(self.session.handle("undo")[0], "ok")
+		self.assertFalse(self.session.game_handler.is_won())
+		self.assertEqual(self.session.handle("redo")[0], "won")
+
+	def test_quit(self):
+		self.assertIsNone(self.session.handle("quit"))
+
+
+class TestProtocol(unittest.TestCase):
+	def test_dot_stuffing(self):
+		async def read(data):
+			reader = asyncio.StreamReader()
+			reader.feed_data(data)
+			reader.feed_eof()
+			return await _read_reply(reader)
+		lines = ["ok", ".", "..x", ""]
+		self.assertEqual(asyncio.run(read(_encode(lines))), lines)
+		with self.assertRaises(ConnectionError):
+			asyncio.run(read(b"ok\n"))
+
+
+class TestGameServer(unittest.TestCase):
+	def test_sessions(self):
+		async def run():
+			server = await GameServer(port=0).start()
+			reader, writer = await asyncio.open_connection(server.host, server.port)
+			greeting = await _read_reply(reader)
+			writer.write(b"draw\n")
+			reply = await _read_reply(reader)
+			self.assertEqual(len(server.sessions), 1)
+			writer.write(b"stats\n")
+			stats = json.loads((await _read_reply(reader))[1])
+			writer.write(b"quit\n")
+			await reader.read()
+			writer.close()
+			await server.close()
+			return greeting, reply, stats, server
+		greeting, reply, stats, server = asyncio.run(run())
+		self.assertEqual(greeting[0], "ok")
+		self.assertEqual(reply[0], "ok")
+		self.assertNotEqual(greeting, reply)
+		self.assertEqual(stats["sessions"], 1)
+		self.assertGreater(stats["session_bytes"], 0)
+		self.assertEqual(stats["latency"]["messages"], 1)
+		self.assertEqual(len(server.sessions), 0)
+
+	def test_hint_does_not_stall_other_sessions(self):
+		async def run():
+			server = await GameServer(port=0).start()
+			self.assertGreater(server.stats()["session_bytes"], 0)
+			hinting = await asyncio.open_connection(server.host, server.port)
+			drawing = await asyncio.open_connection(server.host, server.port)
+			for reader, _ in (hinting, drawing):
+				await _read_reply(reader)
+			# a deal whose search runs for the whole budget
+			hinting[1].write(b"new 1\n")
+			await _read_reply(hinting[0])
+			order = []
+
+			async def send(connection, command):
+				reader, writer = connection
+				writer.write(command)
+				reply = await _read_reply(reader)
+				order.append(command)
+				return reply
+
+			hint = asyncio.create_task(send(hinting, b"hint\n"))
+			await asyncio.sleep(0.001)
+			await send(drawing, b"draw\n")
+			reply = await hint
+			for _, writer in (hinting, drawing):
+				writer.close()
+			await server.close()
+			return order, reply
+		budget = server_module.HINT_BUDGET
+		server_module.HINT_BUDGET = 0.5
+		try:
+			order, reply = asyncio.run(run())
+		finally:
+			server_module.HINT_BUDGET = budget
+		self.assertEqual(order, [b"draw\n", b"hint\n"])
+		self.assertTrue(reply[1].startswith("hint "))
+
+	def test_server_full(self):
+		async def run():
+			server = await GameServer(port=0, max_sessions=0).start()
+			reader, writer = await asyncio.open_connection(server.host, server.port)
+			reply = await _read_reply(reader)
+			writer.close()
+			await server.close()
+			return reply
+		self.assertEqual(asyncio.run(run()), ["error server full"])
+
+	def test_load_test(self):
+		stats = asyncio.run(run_load_test(20, 5))
+		self.assertEqual(stats["round_trip"]["messages"], 100)
+		self.assertEqual(stats["sessions_served"], 20)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import unittest
+from app.simulation import *
+
+
+class TestSimulation(unittest.TestCase):
+	def test_play_game_is_reproducible(self):
+		self.assertEqual(play_game(11, random_policy, max_moves=200),
+						 play_game(11, random_policy, max_moves=200))
+
+	def test_results_are_aggregated(self):
+		stats = SimulationStats()
+		stats.add(GameResult(0, True, 100, 2))
+		stats.add(GameResult(1, False, 50, 4))
+		self.assertEqual(stats.as_dict()["win_rate"], 0.5)
+		self.assertEqual(stats.as_dict()["average_moves"], 75)
+		self.assertEqual(stats.as_dict()["average_stock_passes"], 3)
+
+	def test_pool_matches_single_process(self):
+		single = run_simulation("greedy", 0, 12, workers=1, chunk_size=5)
+		pooled = run_simulation("greedy", 0, 12, workers=2, chunk_size=5)
+		self.assertEqual(single.as_dict(), pooled.as_dict())
+
+	def test_load_policy_by_path(self):
+		self.assertIs(load_policy("app.simulation:random_policy"), random_policy)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
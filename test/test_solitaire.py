@@ -0,0 +1,148 @@
+import unittest
+from app.fakecurses import *
+from app.solitaire import *
+from test import test_gamehandler
+
+
+def play(keys):
+	# runs a game on a fake terminal. keys are characters or key codes,
+	# with None marking a pause in typing
+	keys = [ord(key) if isinstance(key, str) else key for key in keys]
+	terminal = FakeTerminal(keys=keys)
+	return Solitaire(terminal.screen, term=terminal), terminal
+
+
+def highlighted(terminal):
+	select_attr = terminal.color_pair(3)
+	return any(attr == select_attr for row in terminal.cells() for _, attr in row)
+
+
+class TestSolitaire(unittest.TestCase):
+	def test_typeahead_is_drawn_once(self):
+		solitaire, terminal = play([" "] * 5 + [None, " ", "q"])
+		self.assertEqual(solitaire.game_handler.cursor, 6)
+		# the opening frame, then one frame for the five draws
+		self.assertEqual(terminal.updates, 2)
+
+	def test_every_pause_is_drawn(self):
+		solitaire, terminal = play([" ", None, " ", None, "q"])
+		self.assertEqual(terminal.updates, 3)
+
+	def test_selection_is_drawn_while_waiting(self):
+		solitaire, terminal = play(["6", None, "z", "q"])
+		self.assertTrue(highlighted(terminal))
+		self.assertIsNone(solitaire.game_ui_handler.selected)
+
+	def test_cancelled_selection_is_never_drawn(self):
+		solitaire, terminal = play(["6", "z", None, "q"])
+		self.assertFalse(highlighted(terminal))
+
+	def test_selection_shrunk_to_nothing(self):
+		solitaire, terminal = play(["6", KEY_DOWN, None, "q"])
+		self.assertFalse(highlighted(terminal))
+		self.assertIsNone(solitaire.game_ui_handler.selected)
+
+	def test_hint_is_shown_until_the_next_key(self):
+		solitaire, terminal = play(["h", None, "q"])
+		self.assertTrue(highlighted(terminal))
+		solitaire, terminal = play(["h", None, "z", None, "q"])
+		self.assertFalse(highlighted(terminal))
+
+	def test_undo_and_redo(self):
+		solitaire, terminal = play([" ", None, "q"])
+		game_handler = solitaire.game_handler
+		drawn = terminal.text()
+		terminal.keys = [ord("u"), None, ord("q")]
+		solitaire.play()
+		self.assertEqual(game_handler.cursor, 0)
+		self.assertNotEqual(terminal.text(), drawn)
+		terminal.keys = [ord("r"), None, ord("q")]
+		solitaire.play()
+		self.assertEqual(game_handler.cursor, 1)
+		self.assertEqual(terminal.text(), drawn)
+
+	def test_undo_marks_only_touched_piles(self):
+		terminal = FakeTerminal()
+		game_handler = GameHandler(2)
+		game_handler.columns[3].append(Card(1, "clubs").flip())
+		game_handler.refresh()
+		ui_handler = GameUiHandler(terminal.screen, game_handler, term=terminal)
+		ui_handler.column_to_ace_pile(3)
+		ui_handler.render()
+		ui_handler.undo()
+		self.assertEqual(ui_handler._dirty, {3, "clubs"})
+		ui_handler.render()
+		ui_handler.redo()
+		self.assertEqual(ui_handler._dirty, {3, "clubs"})
+
+	def test_undo_with_nothing_to_undo(self):
+		solitaire, terminal = play(["u", "r", None, "q"])
+		self.assertFalse(solitaire.game_handler.can_undo())
+
+	def test_draw_with_empty_stock(self):
+		solitaire, terminal = play(["q"])
+		game_handler = solitaire.game_handler
+		game_handler.stock = []
+		game_handler.cursor = 0
+		game_handler.refresh()
+		terminal.keys = [ord(" "), ord("q")]
+		solitaire.play()
+		self.assertFalse(game_handler.can_undo())
+
+	def test_scroll_on_small_terminal(self):
+		# the screens are never set up below the minimum size
+		terminal = FakeTerminal(height=15, keys=[KEY_NPAGE, ord("q")])
+		solitaire = Solitaire(terminal.screen, term=terminal)
+		self.assertEqual(solitaire.game_ui_handler.scroll_y, 0)
+
+	def test_scroll_after_shrinking(self):
+		solitaire, terminal = play(["q"])
+		ui_handler = solitaire.game_ui_handler
+		terminal.screen._height = 15
+		ui_handler.calibrate_screen()
+		ui_handler.scroll_page(1)
+		self.assertEqual(ui_handler.scroll_y, 0)
+
+	def test_waiting_for_a_winnable_deal(self):
+		terminal = FakeTerminal(keys=[ord("q")])
+		shown = []
+
+		class EmptyPool:
+			# proves a deal only once the player has been told
+			def take(self, timeout=None):
+				if timeout == 0:
+					return None
+				shown.append("\n".join(terminal.text()))
+				return 1234
+
+		solitaire = Solitaire(terminal.screen, term=terminal, deal_pool=EmptyPool())
+		self.assertIn("finding a winnable deal", shown[0])
+		self.assertEqual(solitaire.game_handler.seed, 1234)
+		self.assertNotIn("finding a winnable deal", "\n".join(terminal.text()))
+
+	def test_undo_steps_back_past_auto_finish(self):
+		solitaire, terminal = play(["q"])
+		game_handler = test_gamehandler.almost_won_game()
+		solitaire.game_handler = game_handler
+		solitaire.game_ui_handler.game_handler = game_handler
+		terminal.keys = [ord("z"), None, ord("u"), ord("u"), None, ord("q")]
+		solitaire.play()
+		self.assertFalse(game_handler.is_won())
+		self.assertTrue(game_handler.can_redo())
+		terminal.keys = [ord("r"), ord("r"), None, ord("q")]
+		solitaire.play()
+		self.assertTrue(game_handler.is_won())
+
+	def test_auto_finish_is_drawn_once(self):
+		terminal = FakeTerminal()
+		game_handler = test_gamehandler.almost_won_game()
+		ui_handler = GameUiHandler(terminal.screen, game_handler, term=terminal)
+		terminal.reset_counters()
+		ui_handler.auto_finish()
+		ui_handler.render()
+		self.assertTrue(game_handler.is_won())
+		self.assertEqual(terminal.updates, 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
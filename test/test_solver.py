@@ -0,0 +1,95 @@
+import unittest
+from app.solver import *
+
+
+class TestSolver(unittest.TestCase):
+	def test_solves_winnable_position(self):
+		game_handler = endgame(["hearts"], 10)
+		game_handler.columns[0] = [Card(11, "hearts"), Card(13, "hearts").flip()]
+		game_handler.deck = [Card(12, "hearts")]
+		game_handler.refresh()
+		solver = Solver()
+		moves = solver.solve(game_handler)
+		self.assertIsNotNone(moves)
+		for move in moves:
+			game_handler.apply(move)
+		self.assertEqual(sum(len(pile) for pile in game_handler.ace_piles.values()), 52)
+		self.assertGreater(solver.nodes_expanded, 0)
+
+	def test_detects_unwinnable_position(self):
+		game_handler = endgame(["hearts"], 0)
+		game_handler.columns[0] = [Card(1, "hearts"), Card(2, "hearts").flip()]
+		game_handler.deck = [Card(value, "hearts") for value in range(3, 14)]
+		game_handler.refresh()
+		solver = Solver()
+		self.assertFalse(solver.is_winnable(game_handler))
+		# the stock isn't drawn through card by card. playing its king to an
+		# empty column is the only other position
+		self.assertEqual(solver.nodes_expanded, 2)
+
+	def test_solves_real_deal(self):
+		for draw_count in (1, 3):
+			game_handler = GameHandler(4, draw_count)
+			moves = Solver(max_nodes=5000).solve(game_handler)
+			self.assertIsNotNone(moves)
+			for move in moves:
+				game_handler.apply(move)
+			self.assertTrue(game_handler.is_won())
+
+	def test_detects_unwinnable_deal(self):
+		self.assertFalse(Solver(max_nodes=5000).is_winnable(GameHandler(456)))
+
+	def test_search_limit(self):
+		game_handler = GameHandler()
+		solver = Solver(max_nodes=1)
+		if finishing_moves(game_handler) is None:
+			self.assertIsNone(solver.is_winnable(game_handler))
+
+	def test_eviction_keeps_table_bounded(self):
+		solver = Solver(max_nodes=500, max_table_entries=50)
+		# a deal that takes more than max_nodes
+		self.assertIsNone(solver.is_winnable(GameHandler(2)))
+		self.assertLessEqual(len(solver._table), 50)
+		self.assertGreater(solver.cache_evictions, 0)
+
+	def test_key_ignores_order_of_king_columns(self):
+		game_handler = GameHandler(2)
+		game_handler.columns[0] = [Card(13, "spades").flip(), Card(12, "hearts").flip()]
+		game_handler.columns[3] = [Card(4, "clubs"), Card(13, "diamonds").flip()]
+		game_handler.refresh()
+		swapped = game_handler.copy()
+		swapped.columns[0], swapped.columns[3] = swapped.columns[3], swapped.columns[0]
+		swapped.refresh()
+		# a column with a face-down card under its king can't have moved
+		self.assertNotEqual(state_key(game_handler), state_key(swapped))
+		game_handler.columns[3] = [Card(13, "diamonds").flip()]
+		game_handler.refresh()
+		swapped.columns[0] = [Card(13, "diamonds").flip()]
+		swapped.columns[3] = [Card(13, "spades").flip(), Card(12, "hearts").flip()]
+		swapped.refresh()
+		self.assertEqual(state_key(game_handler), state_key(swapped))
+
+	def test_key_ignores_cursor_when_drawing_one(self):
+		for draw_count in (1, 3):
+			game_handler = GameHandler(3, draw_count)
+			key = state_key(game_handler)
+			game_handler.draw()
+			self.assertEqual(state_key(game_handler) == key, draw_count == 1)
+
+
+def endgame(open_suits, height):
+	# every suit except open_suits is complete, and open_suits are built up
+	# to height
+	game_handler = GameHandler()
+	game_handler.deck = []
+	game_handler.discard = []
+	game_handler.columns = [[] for _ in range(game_handler.COLUMNS)]
+	for suit in Card.SUITS:
+		top = height if suit in open_suits else 13
+		game_handler.ace_piles[suit] = [Card(value, suit).flip()
+										for value in range(1, top + 1)]
+	return game_handler
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from multiprocessing import Process
+from app.fakecurses import *
+from app.solitaire import *
+from app.stats import *
+from test import test_gamehandler
+
+
+def make_record(won, seconds=60.0, score=150, moves=100):
+	return GameRecord(0.0, 1, 1, won, moves, seconds, score)
+
+
+def add_records(path, count):
+	store = StatsStore(path)
+	for i in range(count):
+		store.add(make_record(i % 2 == 0))
+
+
+class TestStatsSummary(unittest.TestCase):
+	def test_aggregates(self):
+		summary = StatsSummary()
+		for won, seconds, score in [(True, 90, 120), (True, 70, 250),
+									(False, 30, 40), (True, 80, 130)]:
+			summary.add(make_record(won, seconds, score))
+		self.assertEqual(summary.games, 4)
+		self.assertEqual(summary.wins, 3)
+		self.assertEqual(summary.best_streak, 2)
+		self.assertEqual(summary.current_streak, 1)
+		self.assertEqual(summary.best_seconds, 70)
+		self.assertEqual(summary.best_score, 250)
+		self.assertEqual(summary.scores, {0: 1, 100: 2, 200: 1})
+
+	def test_dict_round_trip(self):
+		summary = StatsSummary()
+		summary.add(make_record(True))
+		loaded = StatsSummary.from_dict(json.loads(json.dumps(summary.as_dict())))
+		self.assertEqual(loaded.as_dict(), summary.as_dict())
+
+	def test_score_counts_the_journal(self):
+		game_handler = test_gamehandler.almost_won_game()
+		game_handler.auto_finish()
+		self.assertEqual(game_handler.score(), 9 * 10)
+		game_handler.undo()
+		self.assertEqual(game_handler.score(), 8 * 10)
+
+
+class TestStatsStore(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "stats.jsonl")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_summary_is_saved(self):
+		add_records(self.path, 5)
+		with open(self.path + ".summary") as f:
+			saved = json.load(f)
+		self.assertEqual(saved["games"], 5)
+		self.assertEqual(saved["offset"], os.path.getsize(self.path))
+		self.assertEqual(StatsStore(self.path).summary().wins, 3)
+
+	def test_unsummarized_records_are_folded_in(self):
+		add_records(self.path, 2)
+		with open(self.path, "a") as f:
+			f.write(json.dumps(make_record(True)._asdict()) + "\n")
+			# a record still being written
+			f.write('{"finished": ')
+		summary = StatsStore(self.path).summary()
+		self.assertEqual(summary.games, 3)
+		self.assertEqual(summary.current_streak, 1)
+
+	def test_missing_summary_is_rebuilt(self):
+		add_records(self.path, 4)
+		os.remove(self.path + ".summary")
+		self.assertEqual(StatsStore(self.path).summary().games, 4)
+
+	def test_compact_keeps_totals(self):
+		add_records(self.path, 30)
+		store = StatsStore(self.path)
+		before = store.summary().as_dict()
+		self.assertEqual(store.compact(keep=5), 25)
+		self.assertEqual(len(store.recent(100)), 5)
+		after = store.summary().as_dict()
+		del before["offset"], after["offset"]
+		self.assertEqual(after, before)
+		store.add(make_record(True))
+		self.assertEqual(store.summary().games, 31)
+
+	@unittest.skipIf(fcntl is None, "needs fcntl for locking")
+	def test_concurrent_writers(self):
+		writers = [Process(target=add_records, args=(self.path, 25)) for _ in range(4)]
+		for writer in writers:
+			writer.start()
+		for writer in writers:
+			writer.join()
+		store = StatsStore(self.path)
+		self.assertEqual(store.summary().games, 100)
+		self.assertEqual(len(store.recent(1000)), 100)
+
+	def test_solitaire_records_left_games(self):
+		store = StatsStore(self.path)
+		terminal = FakeTerminal(keys=[ord(" "), ord("n"), ord("n"), ord(" "), ord("q")])
+		Solitaire(terminal.screen, term=terminal, stats=store)
+		records = store.recent(10)
+		# the game left without a move isn't recorded
+		self.assertEqual(len(records), 2)
+		self.assertEqual([record.moves for record in records], [1, 1])
+		self.assertFalse(records[0].won)
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import unittest
+from itertools import count
+from app.fakecurses import *
+from app.solitaire import *
+from app.tracing import *
+
+
+def fake_clock():
+	# every reading is 1000ns after the last
+	return partial(next, count(0, 1000))
+
+
+class TestKeyTracer(unittest.TestCase):
+	def test_phases(self):
+		tracer = KeyTracer(clock=fake_clock())
+		tracer.end(0, 0, 0)
+		self.assertFalse(tracer.events)
+		tracer.begin(ord(" "))
+		tracer.end(3000, 5000, 6000)
+		event = tracer.as_dict()["events"][0]
+		self.assertEqual(event["key"], " ")
+		self.assertEqual(event["logic_us"], 3)
+		self.assertEqual(event["render_us"], 2)
+		self.assertEqual(event["flush_us"], 1)
+		self.assertEqual(event["total_us"], 6)
+
+	def test_ring_buffer_keeps_latest(self):
+		tracer = KeyTracer(capacity=3, clock=fake_clock())
+		for key in range(ord("a"), ord("f")):
+			tracer.begin(key)
+			tracer.end(0, 0, 0)
+		self.assertEqual([event["key"] for event in tracer.as_dict()["events"]],
+						 ["c", "d", "e"])
+
+	def test_chrome_trace(self):
+		tracer = KeyTracer(clock=fake_clock())
+		tracer.begin(KEY_UP)
+		tracer.end(3000, 5000, 6000)
+		trace_events = tracer.as_chrome_trace()["traceEvents"]
+		self.assertEqual([event["name"] for event in trace_events],
+						 ["KEY_UP", "logic", "render", "flush"])
+		self.assertEqual(trace_events[0]["dur"], 6)
+		self.assertEqual(trace_events[3]["ts"], 5)
+
+	def test_solitaire_records_every_key(self):
+		terminal = FakeTerminal(keys=[ord(" "), ord(" "), ord("6"), ord("z"), ord("q")])
+		tracer = KeyTracer()
+		Solitaire(terminal.screen, tracer=tracer, term=terminal)
+		# the final q ends the game before another frame is drawn
+		self.assertEqual([event["key"] for event in tracer.as_dict()["events"]],
+						 [" ", " ", "6", "z"])
+
+
+if __name__ == "__main__":
+	unittest.main()
\ No newline at end of file